@@ -10,30 +10,49 @@ www.skybell.com for more information. I am in no way affiliated with Skybell.
 from __future__ import annotations
 
 import asyncio
+import copy
 import logging
 import os
+import pickle
+import time
 from asyncio.exceptions import TimeoutError as Timeout
+from collections.abc import AsyncIterator
 from typing import Any, Collection, cast
 
 from aiohttp.client import ClientSession, ClientTimeout
 from aiohttp.client_exceptions import ClientConnectorError, ClientError
 
 from . import utils as UTILS
+from .archive import ActivityArchive
 from .device import SkybellDevice
+from .events import EventQueue
 from .exceptions import SkybellAuthenticationException, SkybellException
 from .helpers import const as CONST
 from .helpers import errors as ERROR
-from .helpers.models import DeviceTypeDict, EventTypeDict
+from .httpcache import ResponseCache, conditional_headers
+from .metrics import Metrics
+from .push import PushListener
+from .ratelimit import TokenBucket
+from .retry import RetryPolicy, get_retry_after
+from .scheduler import PollScheduler
+from .tracing import Tracer
+
+from .helpers.models import (  # isort:skip
+    DeviceTypeDict,
+    EventDict,
+    EventTypeDict,
+    UpdateResultDict,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class Skybell:  # pylint:disable=too-many-instance-attributes
+class Skybell:  # pylint:disable=too-many-instance-attributes, too-many-public-methods
     """Main Skybell class."""
 
     _close_session = False
 
-    def __init__(  # pylint:disable=too-many-arguments
+    def __init__(  # pylint:disable=too-many-arguments, too-many-locals
         self,
         username: str | None = None,
         password: str | None = None,
@@ -43,22 +62,52 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
         disable_cache: bool = False,
         login_sleep: bool = True,
         session: ClientSession | None = None,
+        retry_policy: RetryPolicy | None = None,
+        api_rate_limit: float | None = None,
+        media_rate_limit: float | None = None,
+        response_cache_size: int = CONST.RESPONSE_CACHE_SIZE,
+        cache_flush_delay: float | None = None,
+        activity_history: int = CONST.ACTIVITY_HISTORY,
+        archive_path: str | None = None,
+        metrics: Metrics | None = None,
+        tracer: Tracer | None = None,
     ) -> None:
         """Initialize Skybell object."""
+        self._activity_history = activity_history
+        self._archive = ActivityArchive(archive_path) if archive_path else None
         self._auto_login = auto_login
+        self._cache_dirty = False
+        self._cache_flush_delay = cache_flush_delay
+        self._cache_flush_task: asyncio.Future[None] | None = None
         self._cache_path = cache_path
+        self._cache_writes_saved = 0
         self._devices: dict[str, SkybellDevice] = {}
         self._disable_cache = disable_cache
         self._get_devices = get_devices
+        self._headers: tuple[tuple[str, str, str], dict[str, str]] | None = None
+        self._inflight: dict[tuple[str, str, bool], asyncio.Future[Any]] = {}
+        self._metrics = metrics or Metrics()
         self._password = password
+        self._push: PushListener | None = None
+        self._rate_limiters = {
+            CONST.RATE_LIMIT_API: TokenBucket(api_rate_limit),
+            CONST.RATE_LIMIT_MEDIA: TokenBucket(media_rate_limit),
+        }
+        self._response_cache = ResponseCache(response_cache_size)
+        self._scheduler: PollScheduler | None = None
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._timeout = ClientTimeout(CONST.REQUEST_TIMEOUT)
+        self._tracer = tracer or Tracer()
         if username is not None and self._cache_path == CONST.CACHE_PATH:
             self._cache_path = f"skybell_{username.replace('.', '')}.pickle"
         self._username = username
         if session is None:
-            session = ClientSession()
+            session = ClientSession(trace_configs=[self._metrics.trace_config])
             self._close_session = True
         self._session = session
+        self._login_ready_time: float | None = None
         self._login_sleep = login_sleep
+        self._login_task: asyncio.Future[bool] | None = None
         self._user: dict[str, str] = {}
 
         # Create a new cache template
@@ -76,26 +125,39 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
 
     async def __aexit__(self, *exc_info: Any) -> None:
         """Async exit."""
+        await self.async_stop_polling()
+        await self.async_stop_push()
+        await self.async_flush()
+        if self._archive:
+            await self._archive.async_close()
         if self._session and self._close_session:
             await self._session.close()
 
     async def async_initialize(self) -> list[SkybellDevice]:
         """Initialize."""
-        if not self._disable_cache:
-            await self._async_load_cache()
-        if (
-            self._username is not None
-            and self._password is not None
-            and self._auto_login
-        ):
-            await self.async_login()
-        self._user = await self.async_send_request(CONST.USERS_ME_URL)
-        return await self.async_get_devices()
+        with self._tracer.span(CONST.SPAN_INITIALIZE):
+            if not self._disable_cache:
+                await self._async_load_cache()
+            self._user = {}
+            if (
+                self._username is not None
+                and self._password is not None
+                and self._auto_login
+            ):
+                await self.async_login()
+            if not self._user:
+                # Unless the login readiness probe just fetched it
+                self._user = await self.async_send_request(CONST.USERS_ME_URL)
+            return await self.async_get_devices()
 
     async def async_login(
         self, username: str | None = None, password: str | None = None
     ) -> bool:
-        """Execute Skybell login."""
+        """Execute Skybell login.
+
+        Only one login runs at a time. Callers arriving while a login is in
+        progress wait for that login instead of starting their own.
+        """
         if username is not None:
             self._username = username
         if password is not None:
@@ -106,11 +168,17 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
                 self, f"{ERROR.USERNAME}: {ERROR.PASSWORD}"
             )
 
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.ensure_future(self._async_login())
+        return await asyncio.shield(self._login_task)
+
+    async def _async_login(self) -> bool:
+        """Login and store the new access token."""
         await self.async_update_cache({CONST.ACCESS_TOKEN: ""})
 
         login_data: dict[str, str | int] = {
-            "username": self._username,
-            "password": self._password,
+            "username": cast(str, self._username),
+            "password": cast(str, self._password),
             "appId": cast(str, self.cache(CONST.APP_ID)),
             CONST.TOKEN: cast(str, self.cache(CONST.TOKEN)),
         }
@@ -126,24 +194,51 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
         )
 
         if self._login_sleep:
-            _LOGGER.info("Login successful, waiting 5 seconds...")
-            await asyncio.sleep(5)
+            await self._async_wait_ready()
         else:
             _LOGGER.info("Login successful")
 
         return True
 
+    async def _async_wait_ready(self) -> None:
+        """Probe the API with backoff until the new access token is accepted."""
+        start = time.monotonic()
+        delay = CONST.LOGIN_READY_DELAY
+        waited = 0.0
+        while True:
+            try:
+                if user := await self.async_send_request(
+                    CONST.USERS_ME_URL, retry=False
+                ):
+                    self._user = user
+                    break
+            except SkybellException as ex:
+                _LOGGER.debug("Access token not accepted yet: %s", ex)
+            if waited >= CONST.LOGIN_READY_TIMEOUT:
+                _LOGGER.warning("Access token still not accepted, continuing")
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, CONST.LOGIN_READY_MAX_DELAY)
+        self._login_ready_time = time.monotonic() - start
+        _LOGGER.info(
+            "Login successful, ready after %.2f seconds", self._login_ready_time
+        )
+
     async def async_logout(self) -> bool:
         """Explicit Skybell logout."""
         if len(self.cache(CONST.ACCESS_TOKEN)) > 0:
             # No explicit logout call as it doesn't seem to matter
             # if a logout happens without registering the app which
             # we aren't currently doing.
+            await self.async_stop_polling()
+            await self.async_stop_push()
             if self._session and self._close_session:
                 await self._session.close()
             self._devices = {}
 
             await self.async_update_cache({CONST.ACCESS_TOKEN: ""})
+            await self.async_flush()
 
         return True
 
@@ -161,13 +256,66 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
 
                 # No existing device, create a new one
                 if device:
-                    await device.async_update({device_json[CONST.ID]: device_json})
+                    await device.async_update_device(device_json)
                 else:
-                    device = SkybellDevice(device_json, self)
+                    device = SkybellDevice(device_json, self, self._activity_history)
                     self._devices[device.device_id] = device
 
         return list(self._devices.values())
 
+    async def async_update_all(
+        self,
+        concurrency: int = CONST.UPDATE_ALL_CONCURRENCY,
+        timeout: float | None = None,
+        refresh_devices: bool = False,
+        **kwargs: Any,
+    ) -> dict[str, UpdateResultDict]:
+        """Update all devices in parallel and report the outcome per device.
+
+        At most concurrency devices update at once. Devices still updating
+        when timeout seconds have passed are cancelled and reported with an
+        error. Keyword arguments are passed to each device update.
+        """
+        devices = await self.async_get_devices(refresh=refresh_devices)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        report = {
+            device.device_id: UpdateResultDict(
+                changes=None,
+                device_id=device.device_id,
+                elapsed=0.0,
+                error=None,
+                success=False,
+            )
+            for device in devices
+        }
+
+        async def _async_update(device: SkybellDevice) -> None:
+            result = report[device.device_id]
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    result["changes"] = await device.async_update(**kwargs)
+                except Exception as ex:  # pylint:disable=broad-except
+                    _LOGGER.warning("Failed to update %s: %s", device.device_id, ex)
+                    result["error"] = ex
+                else:
+                    result["success"] = True
+                finally:
+                    result["elapsed"] = time.monotonic() - start
+
+        tasks = {asyncio.ensure_future(_async_update(dev)): dev for dev in devices}
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+                device_id = tasks[task].device_id
+                report[device_id]["error"] = SkybellException(
+                    ERROR.UPDATE_TIMEOUT, device_id
+                )
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return report
+
     async def async_get_device(
         self, device_id: str, refresh: bool = False
     ) -> SkybellDevice:
@@ -185,6 +333,104 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
 
         return device
 
+    async def async_watch_events(
+        self, queue: EventQueue | None = None
+    ) -> AsyncIterator[tuple[SkybellDevice, EventDict]]:
+        """Yield the new events of all devices with their device.
+
+        Watching starts with the first iteration. Events arrive from updates
+        and push, through queue if given to choose its size and policy.
+        """
+        devices = await self.async_get_devices()
+        if queue is None:
+            queue = EventQueue()
+        for device in devices:
+            device.add_watcher(queue)
+        try:
+            while True:
+                yield await queue.async_get()
+        finally:
+            for device in devices:
+                device.remove_watcher(queue)
+
+    async def async_start_polling(self, **kwargs: Any) -> PollScheduler:
+        """Start updating each device on its own adaptive interval.
+
+        Keyword arguments set up the PollScheduler the first time it starts.
+        """
+        if self._scheduler is None:
+            self._scheduler = PollScheduler(**kwargs)
+        self._scheduler.start(await self.async_get_devices())
+        return self._scheduler
+
+    async def async_stop_polling(self) -> None:
+        """Stop updating the devices."""
+        if self._scheduler is not None:
+            await self._scheduler.async_stop()
+
+    async def async_start_push(self, url: str = CONST.PUSH_URL) -> PushListener:
+        """Start receiving device activities by push.
+
+        The devices are loaded first so the activities can be routed to them.
+        The listener keeps reconnecting until it is stopped.
+        """
+        await self.async_get_devices()
+        if self._push is None:
+            self._push = PushListener(self, url)
+        self._push.url = url
+        self._push.start()
+        return self._push
+
+    async def async_stop_push(self) -> None:
+        """Stop receiving device activities by push."""
+        if self._push is not None:
+            await self._push.async_stop()
+
+    @property
+    def archive(self) -> ActivityArchive | None:
+        """Return the activity archive if one is configured."""
+        return self._archive
+
+    @property
+    def metrics(self) -> Metrics:
+        """Return the request metrics per endpoint group."""
+        return self._metrics
+
+    @property
+    def cache_writes_saved(self) -> int:
+        """Return how many cache writes were merged into a later flush."""
+        return self._cache_writes_saved
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        """Return the conditional GET response cache."""
+        return self._response_cache
+
+    @property
+    def rate_limiters(self) -> dict[str, TokenBucket]:
+        """Return the rate limiters for API calls and media downloads."""
+        return self._rate_limiters
+
+    @property
+    def login_ready_time(self) -> float | None:
+        """Return seconds the last login took to be accepted by the API."""
+        return self._login_ready_time
+
+    @property
+    def push(self) -> PushListener | None:
+        """Return the push listener if push was started."""
+        return self._push
+
+    @property
+    def scheduler(self) -> PollScheduler | None:
+        """Return the polling scheduler if polling was started."""
+        return self._scheduler
+
+    @property
+    def tracer(self) -> Tracer:
+        """Return the tracer timing initialize, update and download spans."""
+        return self._tracer
+
     @property
     def user_id(self) -> str:
         """Return logged in user id."""
@@ -208,47 +454,163 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
         retry: bool = True,
         **kwargs: Any,
     ) -> Any:
-        """Send requests to Skybell."""
+        """Send requests to Skybell.
+
+        Unless retry is False, failures the retry policy classifies as
+        transient are sent again after a backoff and a 401 logs in again
+        before the request is resent once. Identical GET requests already in
+        flight are sent only once and their response is shared.
+        """
         if len(self.cache(CONST.ACCESS_TOKEN)) == 0 and url != CONST.LOGIN_URL:
             await self.async_login()
 
-        headers = headers if headers else {}
-        if "cloud.myskybell.com" in url:
-            if len(self.cache(CONST.ACCESS_TOKEN)) > 0:
-                headers["Authorization"] = f"Bearer {self.cache(CONST.ACCESS_TOKEN)}"
-            headers["content-type"] = "application/json"
-            headers["accept"] = "*/*"
-            headers["x-skybell-app-id"] = cast(str, self.cache(CONST.APP_ID))
-            headers["x-skybell-client-id"] = cast(str, self.cache(CONST.CLIENT_ID))
+        if method is not CONST.HTTPMethod.GET or headers or kwargs:
+            return await self._async_send_request(url, headers, method, retry, **kwargs)
+
+        key = (url, cast(str, self.cache(CONST.ACCESS_TOKEN)), retry)
+        if (task := self._inflight.get(key)) is not None:
+            self._metrics.increment(url, "coalesced")
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(
+            self._async_send_request(url, headers, method, retry)
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _async_send_request(
+        self,
+        url: str,
+        headers: dict[str, str] | None,
+        method: CONST.HTTPMethod,
+        retry: bool,
+        **kwargs: Any,
+    ) -> Any:
+        """Send a request, retrying it as the retry policy decides."""
+        attempt = 0
+        relogin = retry
+        while True:
+            login_task = self._login_task
+            try:
+                result = await self._async_request(url, headers, method, **kwargs)
+            except SkybellAuthenticationException:
+                if not relogin:
+                    raise
+                relogin = False
+                self._metrics.increment(url, "relogins")
+                if self._login_task is login_task:
+                    await self.async_login()
+                else:
+                    # Another request logged in since this one was sent
+                    await asyncio.shield(cast(asyncio.Future, self._login_task))
+                continue
+            except (ClientError, Timeout) as ex:
+                retry_after = get_retry_after(ex)
+                if (
+                    not retry
+                    or not self._retry_policy.is_retryable(ex)
+                    or (delay := self._retry_policy.delay(attempt, retry_after)) is None
+                    or not self._retry_policy.acquire()
+                ):
+                    raise SkybellException from ex
+                attempt += 1
+                self._metrics.increment(url, "retries")
+                _LOGGER.debug("Retry %s of %s in %.2fs: %s", attempt, url, delay, ex)
+                await asyncio.sleep(delay)
+                continue
+            self._retry_policy.record_success()
+            return result
+
+    async def _async_request(
+        self,
+        url: str,
+        headers: dict[str, str] | None,
+        method: CONST.HTTPMethod,
+        **kwargs: Any,
+    ) -> Any:
+        """Send a single request and return the parsed response."""
+        api = url.startswith(CONST.API_URL)
+        cached = None
+        if api and method is CONST.HTTPMethod.GET and not kwargs:
+            cached = self._response_cache.lookup(url)
+        if headers or cached:
+            headers = dict(headers or {})
+            if api:
+                headers.update(self._api_headers())
+            if cached:
+                headers.update(conditional_headers(cached))
+        elif api:
+            # The prebuilt headers are not changed, aiohttp copies them
+            headers = self._api_headers()
 
         _LOGGER.debug("HTTP %s %s Request with headers: %s", method, url, headers)
 
+        await self._rate_limiters[
+            CONST.RATE_LIMIT_API if api else CONST.RATE_LIMIT_MEDIA
+        ].async_acquire()
+        start = time.monotonic()
+        status: int | None = None
+        size = 0
         try:
             response = await self._session.request(
                 method.value,
                 url,
                 headers=headers,
-                timeout=ClientTimeout(30),
+                timeout=self._timeout,
                 **kwargs,
             )
+            status = response.status
             if response.status == 401:
                 raise SkybellAuthenticationException(await response.text())
             if response.status in (403, 404):
                 # 403/404 for expired request/device key no longer present in S3
                 _LOGGER.exception(await response.text())
                 return None
+            if response.status == 304 and cached:
+                return self._response_cache.hit(cached)
             response.raise_for_status()
-        except ClientError as ex:
-            if retry:
-                await self.async_login()
-
-                return await self.async_send_request(
-                    url, headers=headers, method=method, retry=False, **kwargs
+            body = await response.read()
+            size = len(body)
+            if json_body := response.content_type == "application/json":
+                result = await response.json()
+            else:
+                result = body
+            # Media URLs are presigned per request and never revalidated
+            if api and json_body and method is CONST.HTTPMethod.GET and not kwargs:
+                self._response_cache.store(
+                    url,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    result,
+                    size,
                 )
-            raise SkybellException from ex
-        if response.content_type == "application/json":
-            return await response.json()
-        return await response.read()
+            return result
+        finally:
+            self._metrics.observe(url, status, time.monotonic() - start, size)
+
+    def _api_headers(self) -> dict[str, str]:
+        """Return the headers sent to the Skybell API.
+
+        They are built again only when the token or ids changed.
+        """
+        key = (
+            cast(str, self.cache(CONST.ACCESS_TOKEN)),
+            cast(str, self.cache(CONST.APP_ID)),
+            cast(str, self.cache(CONST.CLIENT_ID)),
+        )
+        if self._headers is not None and self._headers[0] == key:
+            return self._headers[1]
+        headers = {}
+        if len(key[0]) > 0:
+            headers["Authorization"] = f"Bearer {key[0]}"
+        headers["content-type"] = "application/json"
+        headers["accept"] = "*/*"
+        headers["accept-encoding"] = CONST.ACCEPT_ENCODING
+        headers["x-skybell-app-id"] = key[1]
+        headers["x-skybell-client-id"] = key[2]
+        self._headers = (key, headers)
+        return headers
 
     def cache(self, key: str) -> str | Collection[str]:
         """Get a cached value."""
@@ -267,8 +629,12 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
             if os.path.exists(self._cache_path):
                 _LOGGER.debug("Cache found at: %s", self._cache_path)
                 if os.path.getsize(self._cache_path) > 0:
-                    loaded_cache = await UTILS.async_load_cache(self._cache_path)
-                    UTILS.update(self._cache, loaded_cache)
+                    try:
+                        loaded_cache = await UTILS.async_load_cache(self._cache_path)
+                    except (ValueError, pickle.UnpicklingError) as ex:
+                        _LOGGER.warning("Ignoring unreadable cache: %s", ex)
+                    else:
+                        UTILS.update(self._cache, loaded_cache)
                 else:
                     _LOGGER.debug("Cache file is empty.  Removing it.")
                     os.remove(self._cache_path)
@@ -276,8 +642,34 @@ class Skybell:  # pylint:disable=too-many-instance-attributes
         await self._async_save_cache()
 
     async def _async_save_cache(self) -> None:
-        """Trigger a cache save."""
-        if not self._disable_cache:
+        """Trigger a cache save.
+
+        With a cache flush delay the cache is only marked dirty and written
+        once the delay has passed, together with any changes made meanwhile.
+        """
+        if self._disable_cache:
+            return
+        if self._cache_flush_delay is None:
+            await UTILS.async_save_cache(self._cache, self._cache_path)
+        elif self._cache_dirty:
+            self._cache_writes_saved += 1
+        else:
+            self._cache_dirty = True
+            self._cache_flush_task = asyncio.ensure_future(self._async_flush_later())
+
+    async def _async_flush_later(self) -> None:
+        """Flush the cache once the flush delay has passed."""
+        await asyncio.sleep(cast(float, self._cache_flush_delay))
+        self._cache_flush_task = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Write pending cache changes to disk now."""
+        if self._cache_flush_task is not None:
+            self._cache_flush_task.cancel()
+            self._cache_flush_task = None
+        if self._cache_dirty:
+            self._cache_dirty = False
             await UTILS.async_save_cache(self._cache, self._cache_path)
 
     async def async_test_ports(self, host: str, ports: list[int] | None = None) -> bool:
@@ -0,0 +1,131 @@
+"""The activity archive used by AIOSkybell."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable
+
+from .events import parse_created
+from .helpers.models import EventDict
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS activities (
+        id TEXT PRIMARY KEY,
+        device TEXT NOT NULL,
+        event TEXT NOT NULL,
+        created REAL NOT NULL,
+        data TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS activities_device_event_created
+    ON activities (device, event, created)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS activities_device_created
+    ON activities (device, created)
+    """,
+)
+
+
+class ActivityArchive:
+    """Class to keep the activity history of devices in SQLite.
+
+    All database work runs on a single worker thread, off the event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Set up the activity archive."""
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="aioskybell")
+
+    async def _async_run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func on the database thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            with self._connection:
+                for statement in _SCHEMA:
+                    self._connection.execute(statement)
+        return self._connection
+
+    async def async_add(self, device_id: str, activities: list[EventDict]) -> None:
+        """Store activities of a device, ignoring those already stored."""
+        if activities:
+            await self._async_run(self._add, device_id, activities)
+
+    def _add(self, device_id: str, activities: list[EventDict]) -> None:
+        """Insert activities in one batch."""
+        rows = [
+            (
+                activity.id,
+                device_id,
+                activity.event,
+                parse_created(activity.createdAt).timestamp(),
+                json.dumps(dict(activity), separators=(",", ":"), default=str),
+            )
+            for activity in activities
+        ]
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO activities VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    async def async_query(  # pylint:disable=too-many-arguments
+        self,
+        device_id: str,
+        event: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[EventDict]:
+        """Return stored activities of a device newest first."""
+        return await self._async_run(self._query, device_id, event, since, until, limit)
+
+    def _query(  # pylint:disable=too-many-arguments
+        self,
+        device_id: str,
+        event: str | None,
+        since: datetime | None,
+        until: datetime | None,
+        limit: int | None,
+    ) -> list[EventDict]:
+        """Select activities matching the filters."""
+        query = "SELECT data FROM activities WHERE device = ?"
+        params: list[Any] = [device_id]
+        if event is not None:
+            query += " AND event = ?"
+            params.append(event)
+        if since is not None:
+            query += " AND created >= ?"
+            params.append(since.timestamp())
+        if until is not None:
+            query += " AND created <= ?"
+            params.append(until.timestamp())
+        query += " ORDER BY created DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._connect().execute(query, params).fetchall()
+        return [EventDict.from_json(json.loads(row[0])) for row in rows]
+
+    async def async_close(self) -> None:
+        """Close the database."""
+        await self._async_run(self._close)
+        self._executor.shutdown()
+
+    def _close(self) -> None:
+        """Close the connection if it is open."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -1,23 +1,33 @@
 """The device class used by AIOSkybell."""
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
+import inspect
 import logging
-from datetime import datetime
-from typing import TYPE_CHECKING, Any, cast
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, ContextManager
 
 import aiofiles
-from ciso8601 import parse_datetime  # pylint:disable=no-name-in-module
 
 from . import utils as UTILS
+from .endpoints import DeviceEndpoints
+from .events import EventQueue, EventStore
 from .exceptions import SkybellAuthenticationException, SkybellException
 from .helpers import const as CONST
 from .helpers import errors as ERROR
+from .settings import SETTINGS
 
 from .helpers.models import (  # isort:skip
     AvatarDict,
+    ChangeCallback,
+    ChangesDict,
     DeviceDict,
+    DeviceSettings,
     EventDict,
-    EventTypeDict,
     InfoDict,
     SettingsDict,
 )
@@ -27,198 +37,455 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+# The ids of the devices whose settings batch the running code is in
+_BATCHES: ContextVar[frozenset[str]] = ContextVar(
+    "aioskybell_batches", default=frozenset()
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instance-attributes
     """Class to represent each Skybell device."""
 
     _skybell: Skybell
 
-    def __init__(self, device_json: DeviceDict, skybell: Skybell) -> None:
+    def __init__(
+        self,
+        device_json: Mapping[str, Any],
+        skybell: Skybell,
+        activity_history: int = CONST.ACTIVITY_HISTORY,
+    ) -> None:
         """Set up Skybell device."""
-        self._activities: list[EventDict] = []
         self._avatar_json = AvatarDict()
         self._device_id = device_json.get(CONST.ID, "")
-        self._device_json = device_json
+        self._device_json = DeviceDict.from_json(device_json)
+        self._batching = 0
+        self._info_forbidden = False
         self._info_json = InfoDict()
         self._settings_json = SettingsDict()
+        self._settings = DeviceSettings()
+        self._settings_future: asyncio.Future[None] | None = None
+        self._settings_pending: dict[str, str | int] = {}
+        self._settings_timer: asyncio.Future[None] | None = None
+        self.settings_window: float = CONST.SETTINGS_WINDOW
         self._skybell = skybell
         self._type = device_json.get(CONST.TYPE, "")
+        self._urls = DeviceEndpoints.build(self._device_id)
         self.images: dict[str, bytes | None] = {CONST.ACTIVITY: None}
-        self._events: EventTypeDict = {}
-
-    async def _async_device_request(self) -> DeviceDict:
-        url = str.replace(CONST.DEVICE_URL, "$DEVID$", self.device_id)
-        return await self._skybell.async_send_request(url)
-
-    async def _async_avatar_request(self) -> AvatarDict:
-        url = str.replace(CONST.DEVICE_AVATAR_URL, "$DEVID$", self.device_id)
-        return await self._skybell.async_send_request(url)
-
-    async def _async_info_request(self) -> InfoDict:
-        url = str.replace(CONST.DEVICE_INFO_URL, "$DEVID$", self.device_id)
-        if data := await self._skybell.async_send_request(url):
-            data[CONST.CHECK_IN] = parse_datetime(data.get(CONST.CHECK_IN, ""))
+        self._event_store = EventStore(activity_history)
+        self._subscribers: dict[str, list[ChangeCallback]] = {}
+        self._watchers: list[EventQueue] = []
+
+    def _span(self, name: str, **attributes: Any) -> ContextManager[None]:
+        """Return a tracing span of the device."""
+        return self._skybell.tracer.span(name, device_id=self._device_id, **attributes)
+
+    async def _async_device_request(self) -> DeviceDict | None:
+        with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_DEVICES):
+            if data := await self._skybell.async_send_request(self._urls.device):
+                return DeviceDict.from_json(data)
+            return data
+
+    async def _async_avatar_request(self) -> AvatarDict | None:
+        if data := await self._skybell.async_send_request(self._urls.avatar):
+            return AvatarDict.from_json(data)
         return data
 
+    async def _async_info_request(self) -> InfoDict | None:
+        with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_INFO):
+            if data := await self._skybell.async_send_request(self._urls.info):
+                return InfoDict.from_json(data)
+            return data
+
     async def _async_settings_request(
         self,
         json: dict[str, str | int] | None = None,
         **kwargs: Any,
-    ) -> SettingsDict:
-        url = str.replace(CONST.DEVICE_SETTINGS_URL, "$DEVID$", self.device_id)
-        return await self._skybell.async_send_request(url, json=json, **kwargs)
+    ) -> SettingsDict | None:
+        with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_SETTINGS):
+            url = self._urls.settings
+            if data := await self._skybell.async_send_request(url, json=json, **kwargs):
+                return SettingsDict.from_json(data)
+            return data
 
     async def _async_activities_request(self) -> list[EventDict]:
-        url = str.replace(CONST.DEVICE_ACTIVITIES_URL, "$DEVID$", self.device_id)
-        return await self._skybell.async_send_request(url) or []
+        with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_ACTIVITIES):
+            data = await self._skybell.async_send_request(self._urls.activities) or []
+            return [EventDict.from_json(activity) for activity in data]
 
-    async def async_update(  # pylint:disable=too-many-arguments
+    async def async_update(  # pylint:disable=too-many-arguments, too-many-locals
         self,
-        device_json: dict[str, str | dict[str, str]] | None = None,
+        device_json: Mapping[str, Any] | None = None,
         info_json: dict[str, str | dict[str, str]] | None = None,
         settings_json: dict[str, str | int] | None = None,
         avatar_json: dict[str, str] | None = None,
         refresh: bool = True,
         get_devices: bool = False,
-    ) -> None:
-        """Update the internal device json data."""
-        if refresh or device_json or len(self._device_json) == 0:
-            if get_devices:
-                device_json = await self._async_device_request()
-            UTILS.update(self._device_json, device_json or {})
-
-        if refresh or avatar_json or len(self._avatar_json) == 0:
-            result = await self._async_avatar_request()
-            if result[CONST.CREATED_AT] != self._avatar_json.get(CONST.CREATED_AT):
-                self.images[CONST.AVATAR] = await self._skybell.async_send_request(
-                    result[CONST.URL]
-                )
-            self._avatar_json = result
-            UTILS.update(self._avatar_json, avatar_json or {})
-
-        if self.acl == CONST.ACLType.OWNER.value:
-            if refresh or info_json or len(self._info_json) == 0:
-                self._info_json = await self._async_info_request()
-                UTILS.update(self._info_json, info_json or {})
-
-        if self.acl != CONST.ACLType.READ.value:
-            if refresh or settings_json or len(self._settings_json) == 0:
-                self._settings_json = await self._async_settings_request()
-                UTILS.update(self._settings_json, settings_json or {})
+        concurrency: int = 1,
+    ) -> ChangesDict:
+        """Update the internal device json data and return what changed.
+
+        With a concurrency above 1 the avatar, info, settings and activities
+        requests are sent at the same time, at most concurrency at once. The
+        results are merged in that fixed order once all of them returned.
+        The changes are then passed to the subscribed callbacks.
+        """
+        with self._span(CONST.SPAN_UPDATE):
+            old_device = copy.deepcopy(dict(self._device_json))
+            old_avatar, old_info = self._avatar_json, self._info_json
+            old_settings = self._settings_json
+
+            if refresh or device_json or len(self._device_json) == 0:
+                if get_devices:
+                    device_json = await self._async_device_request()
+                UTILS.update(self._device_json, device_json or {})
+
+            get_avatar = refresh or avatar_json or len(self._avatar_json) == 0
+            get_info = self.acl == CONST.ACLType.OWNER.value and (
+                refresh or info_json or len(self._info_json) == 0
+            )
+            get_settings = self.acl != CONST.ACLType.READ.value and (
+                refresh or settings_json or len(self._settings_json) == 0
+            )
 
-        if refresh:
-            await self._async_update_activities()
+            avatar, info, settings, activities = await UTILS.async_gather_limited(
+                concurrency,
+                self._async_avatar_update if get_avatar else None,
+                self._async_info_request if get_info else None,
+                self._async_settings_request if get_settings else None,
+                self._async_activities_request if refresh else None,
+            )
 
-    async def _async_update_activities(self) -> None:
-        """Update stored activities and update caches as required."""
-        activities = await self._async_activities_request()
+            if avatar is not None:
+                self._avatar_json = avatar
+                UTILS.update(self._avatar_json, avatar_json or {})
 
-        self._activities = activities
-        _LOGGER.debug("Device Activities Response: %s", self._activities)
+            if get_info:
+                self._info_forbidden = info is None
+            if info is not None:
+                self._info_json = info
+                UTILS.update(self._info_json, info_json or {})
 
-        await self._async_update_events()
+            if settings is not None:
+                UTILS.update(settings, settings_json or {})
+                self._update_settings(settings)
 
-        if url := self.latest().get(CONST.MEDIA_URL):
-            self.images[CONST.ACTIVITY] = await self._skybell.async_send_request(url)
+            changes = ChangesDict()
+            for section, old, new in (
+                (CONST.CHANGE_DEVICE, old_device, self._device_json),
+                (CONST.CHANGE_AVATAR, old_avatar, self._avatar_json),
+                (CONST.CHANGE_INFO, old_info, self._info_json),
+                (CONST.CHANGE_SETTINGS, old_settings, self._settings_json),
+            ):
+                if old is not new and (diff := UTILS.diff(old, new)):
+                    changes[section] = diff
+
+            if activities is not None:
+                if events := await self._async_update_activities(activities):
+                    changes[CONST.CHANGE_EVENTS] = events
+
+            await self._async_publish(changes)
+            return changes
+
+    async def async_update_device(self, device_json: Mapping[str, Any]) -> ChangesDict:
+        """Merge the device json from the devices list and return what changed.
+
+        No other requests are sent. The changes are passed to the subscribed
+        callbacks.
+        """
+        old_device = copy.deepcopy(dict(self._device_json))
+        UTILS.update(self._device_json, device_json)
+        changes = ChangesDict()
+        if diff := UTILS.diff(old_device, self._device_json):
+            changes[CONST.CHANGE_DEVICE] = diff
+        await self._async_publish(changes)
+        return changes
+
+    def subscribe(self, key: str, callback: ChangeCallback) -> Callable[[], None]:
+        """Call back on changes of key and return a function to unsubscribe.
+
+        The key is a section such as "settings", to be called for each of its
+        changed fields, or a single field such as "settings.chime_level". The
+        callback gets the changed key with its old and new value, or with None
+        and the new events for "events". It may be a coroutine function.
+        """
+        self._subscribers.setdefault(key, []).append(callback)
+
+        def unsubscribe() -> None:
+            self._subscribers[key].remove(callback)
+
+        return unsubscribe
+
+    async def _async_publish(self, changes: ChangesDict) -> None:
+        """Call the callbacks subscribed to the changes."""
+        if not self._subscribers:
+            return
+        for section, change in changes.items():
+            if section == CONST.CHANGE_EVENTS:
+                fields = {section: (None, change)}
+            else:
+                fields = {f"{section}.{key}": value for key, value in change.items()}
+            for key, (old, new) in fields.items():
+                callbacks = list(self._subscribers.get(section, []))
+                if key != section:
+                    callbacks += self._subscribers.get(key, [])
+                for callback in callbacks:
+                    try:
+                        if inspect.isawaitable(result := callback(key, old, new)):
+                            await result
+                    except Exception:  # pylint:disable=broad-except
+                        _LOGGER.exception("Error in callback for %s", key)
+
+    async def _async_avatar_update(self) -> AvatarDict | None:
+        """Get the avatar and download its image if it changed."""
+        with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_AVATAR):
+            result = await self._async_avatar_request()
+            if result is not None and result.createdAt != self._avatar_json.createdAt:
+                self.images[CONST.AVATAR] = await self._skybell.async_send_request(
+                    result.url
+                )
+            return result
 
-    async def _async_update_events(
+    async def _async_update_activities(
         self, activities: list[EventDict] | None = None
-    ) -> None:
-        """Update our cached list of latest activity events."""
-        activities = activities or self._activities
-        for activity in activities:
-            event = activity[CONST.EVENT]
-            created = activity[CONST.CREATED_AT]
-
-            if not (old := self._events.get(event)) or created >= old[CONST.CREATED_AT]:
-                self._events[event] = activity
-
-    def activities(self, limit: int = 1, event: str | None = None) -> list[EventDict]:
-        """Return device activity information."""
-        activities = self._activities
-
-        # Filter our activity array if requested
-        if event:
-            activities = list(filter(lambda act: act[CONST.EVENT] == event, activities))
+    ) -> list[EventDict]:
+        """Merge new activities and update caches as required.
+
+        Only activities newer than the last seen one and with an unknown id
+        are added, known ones get their fresh media URLs. The image of the
+        latest activity is downloaded when new ones arrived. The new
+        activities are returned.
+        """
+        if activities is None:
+            activities = await self._async_activities_request()
+
+        if new := await self._async_store_activities(activities):
+            await self._async_activity_image_update()
+        return new
+
+    async def async_add_activities(
+        self, activities: list[EventDict]
+    ) -> list[EventDict]:
+        """Add activities received outside of an update, such as by push.
+
+        The new activities are passed to the events callbacks and returned.
+        They do not move the watermark, so the next update still adds older
+        activities it has not seen yet.
+        """
+        if new := await self._async_store_activities(activities, advance=False):
+            await self._async_activity_image_update()
+            await self._async_publish(ChangesDict({CONST.CHANGE_EVENTS: new}))
+        return new
+
+    async def _async_store_activities(
+        self, activities: list[EventDict], advance: bool = True
+    ) -> list[EventDict]:
+        """Add activities to the event store and archive, return the new ones."""
+        new = self._event_store.add(activities, advance)
+        _LOGGER.debug("Device Activities added: %s", new)
+        if self._skybell.archive:
+            await self._skybell.archive.async_add(self.device_id, new)
+        for queue in self._watchers:
+            for event in new:
+                await queue.async_put(self, event)
+        return new
+
+    def add_watcher(self, queue: EventQueue) -> None:
+        """Put the new events of the device in the queue until removed."""
+        self._watchers.append(queue)
+
+    def remove_watcher(self, queue: EventQueue) -> None:
+        """Stop putting the new events of the device in the queue."""
+        self._watchers.remove(queue)
+
+    async def async_watch_events(
+        self, queue: EventQueue | None = None
+    ) -> AsyncIterator[EventDict]:
+        """Yield the new events of the device, oldest first.
+
+        Watching starts with the first iteration. Events arrive from updates
+        and push, through queue if given to choose its size and policy.
+        """
+        if queue is None:
+            queue = EventQueue()
+        self.add_watcher(queue)
+        try:
+            while True:
+                yield (await queue.async_get())[1]
+        finally:
+            self.remove_watcher(queue)
+
+    async def _async_activity_image_update(self) -> None:
+        """Download the image of the latest activity."""
+        if url := self.latest().media:
+            with self._span(CONST.SPAN_REQUEST, endpoint=CONST.METRIC_MEDIA):
+                self.images[CONST.ACTIVITY] = await self._skybell.async_send_request(
+                    url
+                )
 
-        # Return the requested number
-        return activities[:limit]
+    def activities(
+        self,
+        limit: int = 1,
+        event: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[EventDict]:
+        """Return device activity information, newest first."""
+        return self._event_store.activities(limit, event, since, until)
+
+    async def async_history(
+        self,
+        event: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[EventDict]:
+        """Return archived device activities, newest first."""
+        if not self._skybell.archive:
+            raise SkybellException(self, "No activity archive configured")
+        return await self._skybell.archive.async_query(
+            self.device_id, event, since, until, limit
+        )
 
     def latest(self, event: str | None = None) -> EventDict:
         """Return the latest event activity (motion or button)."""
-        _LOGGER.debug(self._events)
-
         if event:
-            _evt: dict[str, str]
-            if not (_evt := self._events.get(f"device:sensor:{event}", {})):
-                _default = {CONST.CREATED_AT: "1970-01-01T00:00:00.000Z"}
-                _evt = self._events.get(f"application:on-{event}", _default)
-            _entry = {CONST.CREATED_AT: parse_datetime(_evt[CONST.CREATED_AT])}
-            return cast(EventDict, _evt | _entry)
-
-        latest: EventDict = EventDict()
-        latest_date = None
-        for evt in self._events.values():
-            date = parse_datetime(evt[CONST.CREATED_AT])
-            if len(latest) == 0 or latest_date is None or latest_date < date:
-                latest = evt
-                latest_date = date
-        return latest
+            if not (latest := self._event_store.latest(f"device:sensor:{event}")):
+                latest = self._event_store.latest(f"application:on-{event}")
+            if latest is None:
+                return EventDict({CONST.CREATED_AT: EPOCH})
+            return latest[1] | {CONST.CREATED_AT: latest[0]}
+
+        if (latest := self._event_store.latest()) is None:
+            return EventDict()
+        return latest[1]
 
     async def async_set_setting(
         self, key: str, value: bool | str | int | tuple[int, int, int]
     ) -> None:
-        """Set attribute."""
-        if key in [CONST.DO_NOT_DISTURB, CONST.DO_NOT_RING]:
-            await self._async_set_setting({key: str(value)})
-        if key == ("motion_sensor" or CONST.MOTION_POLICY):
-            key = CONST.MOTION_POLICY
-            value = bool(value)
-            value = CONST.MOTION_POLICY_ON if value is True else CONST.MOTION_POLICY_OFF
-            await self._async_set_setting({key: value})
-        if key == CONST.RGB_COLOR:
-            if not isinstance(value, (list, tuple)) or not all(
-                isinstance(item, int) for item in value
-            ):
-                raise SkybellException(self, value)
-
-            await self._async_set_setting(
-                {
-                    CONST.LED_R: value[0],
-                    CONST.LED_G: value[1],
-                    CONST.LED_B: value[2],
-                }
-            )
-        if key in [
-            CONST.OUTDOOR_CHIME,
-            CONST.MOTION_THRESHOLD,
-            CONST.VIDEO_PROFILE,
-            CONST.BRIGHTNESS,
-            "brightness",
-        ] and not isinstance(value, tuple):
-            key = CONST.BRIGHTNESS if key == "brightness" else key
-            await self._async_set_setting({key: int(value)})
-
-    async def _async_set_setting(self, settings: dict[str, str | int]) -> None:
-        """Validate the settings and then send the PATCH request."""
+        """Set attribute, sending nothing if it already has the value."""
         if self.acl == CONST.ACLType.READ.value:
             raise SkybellAuthenticationException(
                 self, "Attempted setting with invalid scope"
             )
-        for key, value in settings.items():
-            _validate_setting(key, value)
+        if (schema := SETTINGS.get(key)) is None:
+            return
+        typed, settings = schema.encode(key, value)
+        # Compare against known settings only, a queued change may differ
+        if (
+            not self._settings_pending.keys() & settings.keys()
+            and all(field in self._settings_json for field in schema.fields)
+            and getattr(self._settings, schema.attribute) == typed
+        ):
+            _LOGGER.debug("Setting %s is already %s", key, value)
+            return
+        await self._async_set_setting(settings)
+
+    @contextlib.asynccontextmanager
+    async def async_batch_settings(self) -> AsyncIterator[None]:
+        """Send all settings changed inside the block as one PATCH on exit.
+
+        Setting changes inside the block return once validated. Changes from
+        other tasks are held back too and wait for that PATCH. If the block
+        raises, the queued changes are dropped and their waiters fail.
+        """
+        self._batching += 1
+        token = _BATCHES.set(_BATCHES.get() | {self._device_id})
+        try:
+            yield
+        except BaseException:
+            self._drop_settings()
+            raise
+        finally:
+            _BATCHES.reset(token)
+            self._batching -= 1
+        if not self._batching:
+            await self._async_flush_settings()
 
+    async def _async_set_setting(self, settings: dict[str, str | int]) -> None:
+        """Queue encoded settings for the PATCH request.
+
+        Changes made within settings_window seconds of each other, or while
+        a batch is open, are merged and sent together. Callers outside the
+        batch wait for that request.
+        """
+        self._settings_pending.update(settings)
+        if (future := self._settings_future) is None:
+            future = self._settings_future = asyncio.get_running_loop().create_future()
+            if not self._batching:
+                self._settings_timer = asyncio.ensure_future(
+                    self._async_flush_settings_later()
+                )
+        if self._device_id not in _BATCHES.get():
+            await asyncio.shield(future)
+
+    async def _async_flush_settings_later(self) -> None:
+        """Send the queued settings once the window has passed."""
+        await asyncio.sleep(self.settings_window)
+        self._settings_timer = None
+        if not self._batching:
+            await self._async_flush_settings()
+
+    def _drop_settings(self) -> None:
+        """Drop the queued settings and fail the callers waiting on them."""
+        if self._settings_timer is not None:
+            self._settings_timer.cancel()
+            self._settings_timer = None
+        future = self._settings_future
+        self._settings_pending, self._settings_future = {}, None
+        if future is not None:
+            future.set_exception(SkybellException(ERROR.SETTINGS_BATCH_FAILED))
+            # Mark it read, callers inside the batch do not wait for it
+            future.exception()
+
+    async def _async_flush_settings(self) -> None:
+        """Send the queued settings as one PATCH and resolve its waiters.
+
+        An accepted change is applied to the settings right away and passed
+        to the subscribed callbacks, without refreshing the device.
+        """
+        if self._settings_timer is not None:
+            # The timer only waits here, it clears itself before flushing
+            self._settings_timer.cancel()
+            self._settings_timer = None
+        settings, future = self._settings_pending, self._settings_future
+        self._settings_pending, self._settings_future = {}, None
+        if future is None:
+            return
         try:
-            await self._async_settings_request(
+            result = await self._async_settings_request(
                 json=settings, method=CONST.HTTPMethod.PATCH
             )
         except SkybellException:
             _LOGGER.warning("Exception changing settings: %s", settings)
+            result = None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as ex:
+            future.set_exception(ex)
+            raise
+        if result is None:
+            future.set_result(None)
+            return
+        # Apply the change now, what the device echoed over what was sent.
+        # The next refresh replaces it with the settings as stored.
+        old = self._settings_json
+        requested = SettingsDict.from_json({k: str(v) for k, v in settings.items()})
+        self._update_settings(old | requested | (result or {}))
+        future.set_result(None)
+        if diff := UTILS.diff(old, self._settings_json):
+            await self._async_publish(ChangesDict({CONST.CHANGE_SETTINGS: diff}))
+
+    def _update_settings(self, settings: SettingsDict) -> None:
+        """Store settings and convert them to their typed values once."""
+        self._settings_json = settings
+        self._settings = DeviceSettings.from_json(settings)
 
     async def async_get_activity_video_url(self, video: str | None = None) -> str:
         """Get activity video. Return latest if no video specified."""
-        durl = str.replace(CONST.DEVICE_ACTIVITY_VIDEO_URL, "$DEVID$", self._device_id)
-        act_url = str.replace(durl, "$ACTID$", video or self.latest()[CONST.ID])
+        act_url = self._urls.activity_video(video or self.latest()[CONST.ID])
         return (await self._skybell.async_send_request(act_url))[CONST.URL]
 
     async def async_download_videos(
@@ -229,32 +496,33 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
         delete: bool = False,
     ) -> None:
         """Download videos to specified path."""
-        _path = self._skybell._cache_path[:-7]  # pylint:disable=protected-access
-        if video and (_id := [ev for ev in self._activities if video == ev[CONST.ID]]):
-            return await self._async_save_video(path or _path, _id[0], delete)
-        for event in self.activities(limit=limit):
-            await self._async_save_video(path or _path, event, delete)
+        with self._span(CONST.SPAN_DOWNLOAD_VIDEOS, limit=limit):
+            _path = self._skybell._cache_path[:-7]  # pylint:disable=protected-access
+            if video and (event := self._event_store.get(video)):
+                return await self._async_save_video(path or _path, event, delete)
+            for event in self.activities(limit=limit):
+                await self._async_save_video(path or _path, event, delete)
 
     async def _async_save_video(
         self, path: str, event: EventDict, delete: bool
     ) -> None:
         """Write video from S3 to file."""
-        async with aiofiles.open(f"{path}_{event[CONST.CREATED_AT]}.mp4", "wb") as file:
-            url = await self.async_get_activity_video_url(event[CONST.ID])
-            await file.write(await self._skybell.async_send_request(url))
-        if delete:
-            await self.async_delete_video(event[CONST.ID])
+        with self._span(CONST.SPAN_SAVE_VIDEO, video=event.id):
+            async with aiofiles.open(f"{path}_{event.createdAt}.mp4", "wb") as file:
+                url = await self.async_get_activity_video_url(event.id)
+                await file.write(await self._skybell.async_send_request(url))
+            if delete:
+                await self.async_delete_video(event.id)
 
     async def async_delete_video(self, video: str) -> None:
         """Delete video with specified activity id."""
-        durl = str.replace(CONST.DEVICE_ACTIVITY_URL, "$DEVID$", self._device_id)
-        act_url = str.replace(durl, "$ACTID$", video)
+        act_url = self._urls.activity(video)
         await self._skybell.async_send_request(act_url, method=CONST.HTTPMethod.DELETE)
 
     @property
     def acl(self) -> str:
         """Get access level to device."""
-        return self._device_json[CONST.ACL]
+        return self._device_json.acl
 
     @property
     def owner(self) -> bool:
@@ -264,27 +532,27 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def user_id(self) -> str:
         """Get user id that owns the device."""
-        return self._device_json["user"]
+        return self._device_json.user
 
     @property
     def mac(self) -> str | None:
         """Get device mac address."""
-        return self._info_json.get("mac")
+        return self._info_json.mac
 
     @property
     def serial_no(self) -> str:
         """Get device serial number."""
-        return self._info_json.get("serialNo", "")
+        return self._info_json.serialNo or ""
 
     @property
     def firmware_ver(self) -> str:
         """Get device firmware version."""
-        return self._info_json.get("firmwareVersion", "")
+        return self._info_json.firmwareVersion or ""
 
     @property
     def name(self) -> str:
         """Get device name."""
-        return self._device_json[CONST.NAME]
+        return self._device_json.name
 
     @property
     def type(self) -> str:
@@ -299,7 +567,12 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def status(self) -> str:
         """Get the generic status of a device (up/down)."""
-        return self._device_json[CONST.STATUS]
+        return self._device_json.status
+
+    @property
+    def info_forbidden(self) -> bool:
+        """Return if the last info request was refused."""
+        return self._info_forbidden
 
     @property
     def is_up(self) -> bool:
@@ -309,7 +582,7 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def location(self) -> tuple[str, str]:
         """Return lat and lng tuple."""
-        location = self._device_json.get(CONST.LOCATION, {})
+        location = self._device_json.location or {}
 
         return (
             location.get(CONST.LOCATION_LAT, "0"),
@@ -319,18 +592,18 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def image_url(self) -> str:
         """Get the most recent 'avatar' image."""
-        return self._avatar_json[CONST.URL]
+        return self._avatar_json.url
 
     @property
     def wifi_status(self) -> str:
         """Get the wifi status."""
-        status = self._info_json.get(CONST.STATUS, {})
+        status = self._info_json.status or {}
         return status.get(CONST.WIFI_LINK, "")
 
     @property
     def wifi_ssid(self) -> str:
         """Get the wifi ssid."""
-        return self._info_json.get(CONST.WIFI_SSID, "")
+        return self._info_json.essid or ""
 
     @property
     def last_check_in(self) -> datetime:
@@ -340,17 +613,17 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def do_not_disturb(self) -> bool:
         """Get if do not disturb is enabled."""
-        return self._settings_json.get(CONST.DO_NOT_DISTURB) == "true"
+        return self._settings.do_not_disturb
 
     @property
     def do_not_ring(self) -> bool:
         """Get if do not ring is enabled."""
-        return self._settings_json.get(CONST.DO_NOT_RING) == "true"
+        return self._settings.do_not_ring
 
     @property
     def outdoor_chime_level(self) -> int:
         """Get devices outdoor chime level."""
-        return int(self._settings_json.get(CONST.OUTDOOR_CHIME, "0"))
+        return self._settings.outdoor_chime_level
 
     @property
     def outdoor_chime(self) -> bool:
@@ -360,31 +633,27 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
     @property
     def motion_sensor(self) -> bool:
         """Get if the devices motion sensor is enabled."""
-        return self._settings_json.get(CONST.MOTION_POLICY) == CONST.MOTION_POLICY_ON
+        return self._settings.motion_sensor
 
     @property
     def motion_threshold(self) -> int:
         """Get devices motion threshold."""
-        return int(self._settings_json.get(CONST.MOTION_THRESHOLD, "0"))
+        return self._settings.motion_threshold
 
     @property
     def video_profile(self) -> int:
         """Get devices video profile."""
-        return int(self._settings_json.get(CONST.VIDEO_PROFILE, "0"))
+        return self._settings.video_profile
 
     @property
     def led_rgb(self) -> tuple[int, int, int]:
         """Get devices LED color."""
-        return (
-            int(self._settings_json.get(CONST.LED_R, "")),
-            int(self._settings_json.get(CONST.LED_G, "")),
-            int(self._settings_json.get(CONST.LED_B, "")),
-        )
+        return self._settings.led_rgb
 
     @property
     def led_intensity(self) -> int:
         """Get devices LED intensity."""
-        return int(self._settings_json.get(CONST.BRIGHTNESS, "0"))
+        return self._settings.led_intensity
 
     @property
     def desc(self) -> str:
@@ -392,36 +661,3 @@ class SkybellDevice:  # pylint:disable=too-many-public-methods, too-many-instanc
         # Front Door (id: ) - skybell hd - status: up - wifi status: good
         string = f"{self.name} (id: {self.device_id}) - {self.type}"
         return f"{string} - status: {self.status} - wifi status: {self.wifi_status}"
-
-
-def _validate_setting(  # pylint:disable=too-many-branches
-    setting: str, value: str | int
-) -> None:
-    """Validate the setting and value."""
-    if setting == CONST.DO_NOT_DISTURB:
-        if value not in CONST.BOOL_STRINGS:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting == CONST.DO_NOT_RING:
-        if value not in CONST.BOOL_STRINGS:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting == CONST.OUTDOOR_CHIME:
-        if value not in CONST.OUTDOOR_CHIME_VALUES:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting == CONST.MOTION_THRESHOLD:
-        if value not in CONST.MOTION_THRESHOLD_VALUES:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting == CONST.VIDEO_PROFILE:
-        if value not in CONST.VIDEO_PROFILE_VALUES:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting in CONST.LED_COLORS:
-        if not CONST.LED_VALUES[0] <= int(value) <= CONST.LED_VALUES[1]:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
-
-    if setting == CONST.BRIGHTNESS:
-        if not CONST.BRIGHTNESS_VALUES[0] <= int(value) <= CONST.BRIGHTNESS_VALUES[1]:
-            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (setting, value))
@@ -0,0 +1,56 @@
+"""The API endpoints used by AIOSkybell."""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .helpers import const as CONST
+
+DEVICE_ID = "$DEVID$"
+
+
+def compile_url(template: str, **values: str) -> tuple[str, ...]:
+    """Fill the given $NAME$ placeholders and split the URL at the others.
+
+    Joining the parts with the remaining values in order builds the URL
+    without scanning the template again.
+    """
+    for name, value in values.items():
+        template = template.replace(f"${name}$", value)
+    return tuple(template.split("$")[::2])
+
+
+class DeviceEndpoints(NamedTuple):
+    """Class for the URLs of a device, built once per device."""
+
+    device: str
+    activities: str
+    avatar: str
+    info: str
+    settings: str
+    activity_parts: tuple[str, ...]
+    activity_video_parts: tuple[str, ...]
+
+    @classmethod
+    def build(cls, device_id: str) -> DeviceEndpoints:
+        """Return the URLs of a device."""
+        return cls(
+            device=CONST.DEVICE_URL.replace(DEVICE_ID, device_id),
+            activities=CONST.DEVICE_ACTIVITIES_URL.replace(DEVICE_ID, device_id),
+            avatar=CONST.DEVICE_AVATAR_URL.replace(DEVICE_ID, device_id),
+            info=CONST.DEVICE_INFO_URL.replace(DEVICE_ID, device_id),
+            settings=CONST.DEVICE_SETTINGS_URL.replace(DEVICE_ID, device_id),
+            activity_parts=compile_url(CONST.DEVICE_ACTIVITY_URL, DEVID=device_id),
+            activity_video_parts=compile_url(
+                CONST.DEVICE_ACTIVITY_VIDEO_URL, DEVID=device_id
+            ),
+        )
+
+    def activity(self, activity_id: str) -> str:
+        """Return the URL of an activity."""
+        prefix, suffix = self.activity_parts
+        return prefix + activity_id + suffix
+
+    def activity_video(self, activity_id: str) -> str:
+        """Return the video URL of an activity."""
+        prefix, suffix = self.activity_video_parts
+        return prefix + activity_id + suffix
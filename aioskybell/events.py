@@ -0,0 +1,187 @@
+"""The event store used by AIOSkybell."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from ciso8601 import parse_datetime  # pylint:disable=no-name-in-module
+
+from .exceptions import SkybellException
+from .helpers import const as CONST
+from .helpers import errors as ERROR
+from .helpers.models import EventDict
+
+if TYPE_CHECKING:
+    from .device import SkybellDevice
+
+_MEDIA_FIELDS = ("media", "mediaSmall")
+
+
+def parse_created(created: str) -> datetime:
+    """Return the time of a createdAt, in UTC if it has no offset."""
+    if (parsed := parse_datetime(created)).tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class EventStore:  # pylint:disable=too-many-instance-attributes
+    """Class to keep the activities of a device indexed by time and type.
+
+    Timestamps are parsed once when an activity is added and compared as
+    times, so any ISO 8601 form works. Activities are kept sorted by time,
+    both overall and per event type, so range queries are a binary search
+    and the latest activity of a type is a lookup.
+
+    Activities older than the watermark, or with a known id, are skipped.
+    Only max_size activities are kept, dropping the oldest.
+    """
+
+    def __init__(self, max_size: int = CONST.ACTIVITY_HISTORY) -> None:
+        """Set up the event store."""
+        self.max_size = max_size
+        self._times: list[datetime] = []
+        self._items: list[EventDict] = []
+        self._by_event: dict[str, tuple[list[datetime], list[EventDict]]] = {}
+        self._by_id: dict[str, EventDict] = {}
+        self._latest: dict[str, tuple[datetime, EventDict]] = {}
+        self._newest: tuple[datetime, EventDict] | None = None
+        self._watermark: datetime | None = None
+
+    def __len__(self) -> int:
+        """Return the number of stored activities."""
+        return len(self._items)
+
+    @property
+    def watermark(self) -> datetime | None:
+        """Return the time of the newest activity added by a poll so far."""
+        return self._watermark
+
+    def get(self, activity_id: str) -> EventDict | None:
+        """Return the stored activity with the id."""
+        return self._by_id.get(activity_id)
+
+    def add(self, activities: list[EventDict], advance: bool = True) -> list[EventDict]:
+        """Add activities to the store and return those that were new.
+
+        A known activity takes the media URLs of the one added, as they are
+        presigned and expire. The watermark moves to the newest activity
+        added unless advance is False. Pushed activities leave it, so a poll
+        still adds the older activities it has not seen yet.
+        """
+        new, seen = [], set()
+        for activity in activities:
+            if (known := self._by_id.get(activity.id)) is not None:
+                for field in _MEDIA_FIELDS:
+                    if (url := getattr(activity, field)) is not None:
+                        setattr(known, field, url)
+                continue
+            created = parse_created(activity.createdAt)
+            if self._watermark is not None and created < self._watermark:
+                continue
+            if activity.id not in seen:
+                seen.add(activity.id)
+                new.append((created, activity))
+        new.sort(key=lambda item: item[0])
+
+        for created, activity in new:
+            event = activity.event
+
+            index = bisect_right(self._times, created)
+            self._times.insert(index, created)
+            self._items.insert(index, activity)
+            self._by_id[activity.id] = activity
+
+            times, items = self._by_event.setdefault(event, ([], []))
+            index = bisect_right(times, created)
+            times.insert(index, created)
+            items.insert(index, activity)
+
+            if (old := self._latest.get(event)) is None or created >= old[0]:
+                self._latest[event] = (created, activity)
+            if self._newest is None or created >= self._newest[0]:
+                self._newest = (created, activity)
+
+        if advance and new:
+            if self._watermark is None or new[-1][0] > self._watermark:
+                self._watermark = new[-1][0]
+        while len(self._items) > self.max_size:
+            self._drop_oldest()
+        return [activity for _, activity in new]
+
+    def _drop_oldest(self) -> None:
+        """Drop the oldest activity from all indexes."""
+        created = self._times.pop(0)
+        activity = self._items.pop(0)
+        del self._by_id[activity.id]
+        times, items = self._by_event[activity.event]
+        index = bisect_left(times, created)
+        while items[index] is not activity:
+            index += 1
+        del times[index]
+        del items[index]
+
+    def activities(
+        self,
+        limit: int | None = None,
+        event: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[EventDict]:
+        """Return activities newest first, optionally by type and time range."""
+        times, items = (
+            self._by_event.get(event, ([], [])) if event else (self._times, self._items)
+        )
+        start = bisect_left(times, since) if since else 0
+        end = bisect_right(times, until) if until else len(times)
+        if limit is not None:
+            start = max(start, end - limit)
+        return items[start:end][::-1]
+
+    def latest(self, event: str | None = None) -> tuple[datetime, EventDict] | None:
+        """Return the time and activity of the latest event of a type."""
+        if event is None:
+            return self._newest
+        return self._latest.get(event)
+
+
+class EventQueue:
+    """Class to pass new events of devices to a watcher.
+
+    When maxsize events are waiting, block makes the device update wait for
+    room, drop_oldest discards the oldest waiting event and drop_newest
+    discards the incoming one. Discarded events are counted in dropped.
+    """
+
+    def __init__(
+        self, maxsize: int = CONST.WATCH_QUEUE_SIZE, policy: str = CONST.WATCH_BLOCK
+    ) -> None:
+        """Set up the event queue."""
+        if policy not in CONST.WATCH_POLICIES:
+            raise SkybellException(ERROR.INVALID_WATCH_POLICY, policy)
+        self.policy = policy
+        self.dropped = 0
+        self._queue: asyncio.Queue[tuple[SkybellDevice, EventDict]] = asyncio.Queue(
+            maxsize
+        )
+
+    def __len__(self) -> int:
+        """Return the number of waiting events."""
+        return self._queue.qsize()
+
+    async def async_put(self, device: SkybellDevice, event: EventDict) -> None:
+        """Queue an event of a device, applying the policy when full."""
+        if self.policy == CONST.WATCH_BLOCK:
+            await self._queue.put((device, event))
+            return
+        if self._queue.full():
+            self.dropped += 1
+            if self.policy == CONST.WATCH_DROP_NEWEST:
+                return
+            self._queue.get_nowait()
+        self._queue.put_nowait((device, event))
+
+    async def async_get(self) -> tuple[SkybellDevice, EventDict]:
+        """Wait for the next event and return it with its device."""
+        return await self._queue.get()
@@ -12,13 +12,18 @@ class HTTPMethod(Enum):
 
 
 CACHE_PATH = "./skybell.pickle"
+CACHE_DATA_KEY = "data"
+CACHE_VERSION = 1
+CACHE_VERSION_KEY = "version"
 
 # URLS
-BASE_URL = "https://cloud.myskybell.com/api/v3/"
-BASE_URL_V4 = "https://cloud.myskybell.com/api/v4/"
+API_URL = "https://cloud.myskybell.com/"
+BASE_URL = API_URL + "api/v3/"
+BASE_URL_V4 = API_URL + "api/v4/"
 
 LOGIN_URL = BASE_URL + "login/"
 LOGOUT_URL = BASE_URL + "logout/"
+REGISTER_URL = BASE_URL + "register/"
 
 USERS_ME_URL = BASE_URL + "users/me/"
 
@@ -36,6 +41,8 @@ SUBSCRIPTION_URL = BASE_URL + "subscriptions/$SUBSCRIPTIONID$"
 SUBSCRIPTION_INFO_URL = SUBSCRIPTION_URL + "/info/"
 SUBSCRIPTION_SETTINGS_URL = SUBSCRIPTION_URL + "/settings/"
 
+PUSH_URL = "wss://cloud.myskybell.com/socket.io/"
+
 
 # ACLs
 class ACLType(str, Enum):
@@ -53,6 +60,84 @@ CLIENT_ID = "client_id"
 DEVICES = "devices"
 TOKEN = "token"
 
+# LOGIN
+LOGIN_READY_DELAY = 0.1
+LOGIN_READY_MAX_DELAY = 1.6
+LOGIN_READY_TIMEOUT = 5
+
+# METRICS
+METRIC_ACTIVITIES = "activities"
+METRIC_AVATAR = "avatar"
+METRIC_DEVICES = "devices"
+METRIC_INFO = "info"
+METRIC_LOGIN = "login"
+METRIC_MEDIA = "media"
+METRIC_OTHER = "other"
+METRIC_SETTINGS = "settings"
+METRIC_VIDEO_URL = "video_url"
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PREFIX = "aioskybell"
+
+# POLLING
+POLL_ACTIVE_INTERVAL = 10
+POLL_ACTIVE_WINDOW = 300
+POLL_INTERVAL = 60
+POLL_JITTER = 0.1
+POLL_MAX_INTERVAL = 900
+
+# PUSH
+PUSH_ENGINEIO_VERSION = "4"
+PUSH_OPEN_TIMEOUT = 30
+PUSH_PROTOCOL = "socketio"
+PUSH_RECONNECT_DELAY = 1
+PUSH_RECONNECT_MAX_DELAY = 60
+
+# RATE LIMITS
+RATE_LIMIT_API = "api"
+RATE_LIMIT_MEDIA = "media"
+
+# REQUESTS
+ACCEPT_ENCODING = "gzip, deflate"
+REQUEST_TIMEOUT = 30
+
+# RESPONSE CACHE
+RESPONSE_CACHE_SIZE = 1024 * 1024
+
+# RETRIES
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_BUDGET = 10
+RETRY_BUDGET_REFILL = 0.1
+RETRY_JITTER = 0.5
+RETRY_MAX_BACKOFF = 10
+RETRY_MAX_RETRY_AFTER = 30
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# SETTINGS
+SETTINGS_WINDOW = 0
+
+# WATCHING
+WATCH_BLOCK = "block"
+WATCH_DROP_NEWEST = "drop_newest"
+WATCH_DROP_OLDEST = "drop_oldest"
+WATCH_POLICIES = [WATCH_BLOCK, WATCH_DROP_NEWEST, WATCH_DROP_OLDEST]
+WATCH_QUEUE_SIZE = 100
+
+# TRACING
+SPAN_DOWNLOAD_VIDEOS = "device.download_videos"
+SPAN_INITIALIZE = "skybell.initialize"
+SPAN_REQUEST = "device.request"
+SPAN_SAVE_VIDEO = "device.save_video"
+SPAN_UPDATE = "device.update"
+
+# UPDATES
+CHANGE_AVATAR = "avatar"
+CHANGE_DEVICE = "device"
+CHANGE_EVENTS = "events"
+CHANGE_INFO = "info"
+CHANGE_SETTINGS = "settings"
+UPDATE_ALL_CONCURRENCY = 8
+
 # ATTRIBUTES
 ATTR_LAST_CHECK_IN = "last_check_in"
 ATTR_WIFI_SSID = "wifi_ssid"
@@ -81,6 +166,7 @@ WIFI_LINK = "wifiLink"
 WIFI_SSID = "essid"
 
 # DEVICE ACTIVITIES
+ACTIVITY_HISTORY = 100
 CREATED_AT = "createdAt"
 EVENT = "event"
 EVENT_BUTTON = "device:sensor:button"
@@ -17,3 +17,11 @@ COLOR_VALUE_NOT_VALID = (
 )
 
 COLOR_INTENSITY_NOT_VALID = (7, "Intensity value is not a valid integer")
+
+UPDATE_TIMEOUT = (8, "Device update did not finish before the deadline")
+
+PUSH_FAILED = (9, "Push connection was refused")
+
+INVALID_WATCH_POLICY = (10, "Watch policy is not valid")
+
+SETTINGS_BATCH_FAILED = (11, "Settings batch failed, its changes were not sent")
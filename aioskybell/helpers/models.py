@@ -1,14 +1,130 @@
 """Models for Skybell."""
 from __future__ import annotations
 
+from collections.abc import (  # isort:skip
+    Awaitable,
+    Callable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+)
 from datetime import datetime
+from typing import Any, NamedTuple, Optional, TypeVar
 
+from ciso8601 import parse_datetime  # pylint:disable=no-name-in-module
 
-class InfoDict(dict):
+from . import const as CONST
+
+_ModelT = TypeVar("_ModelT", bound="Model")
+
+
+class Model(MutableMapping[str, Any]):
+    """Base class for an API object kept in slots.
+
+    Known JSON fields are stored as attributes, unset ones are None. Unknown
+    fields go to a separate dict, which is only created when needed. The
+    mapping view keeps item access on the JSON field names working.
+    """
+
+    __slots__ = ("_extra",)
+    _fields: frozenset[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Collect the JSON field names of a model."""
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+
+    def __init__(self, data: Mapping[str, Any] | None = None, /, **kwargs: Any) -> None:
+        """Set up the model from JSON data."""
+        for field in self.__slots__:
+            setattr(self, field, None)
+        self._extra: dict[str, Any] | None = None
+        for key, value in (data or {}).items():
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    @classmethod
+    def from_json(cls: type[_ModelT], data: Mapping[str, Any]) -> _ModelT:
+        """Return the model for a JSON object."""
+        return cls(data)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by its JSON name."""
+        if key in self._fields:
+            if (value := getattr(self, key)) is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Set a field by its JSON name."""
+        if key in self._fields:
+            setattr(self, key, value)
+        elif self._extra is None:
+            self._extra = {key: value}
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        """Unset a field by its JSON name."""
+        self[key]  # pylint:disable=pointless-statement
+        if key in self._fields:
+            setattr(self, key, None)
+        else:
+            del self._extra[key]  # type: ignore[union-attr]
+
+    def __iter__(self) -> Iterator[str]:
+        """Return the JSON names of the set fields."""
+        for field in self.__slots__:
+            if getattr(self, field) is not None:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        """Return the number of set fields."""
+        return sum(1 for _ in self)
+
+    def __or__(self: _ModelT, other: Mapping[str, Any]) -> _ModelT:
+        """Return a copy updated with other, like dict."""
+        return type(self)(self, **other)
+
+    def __repr__(self) -> str:
+        """Return the representation of the model."""
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class InfoDict(Model):
     """Class for info."""
 
+    __slots__ = (
+        "address",
+        "checkedInAt",
+        "clientId",
+        "deviceId",
+        "essid",
+        "firmwareVersion",
+        "hardwareRevision",
+        "localHostname",
+        "mac",
+        "port",
+        "proxy_address",
+        "proxy_port",
+        "region",
+        "serialNo",
+        "status",
+        "timestamp",
+        "wifiBitrate",
+        "wifiLinkQuality",
+        "wifiNoise",
+        "wifiSignalLevel",
+        "wifiTxPwrEeprom",
+    )
+
     address: str
-    checkedInAt: str
+    checkedInAt: datetime
     clientId: str
     deviceId: str
     essid: str
@@ -29,10 +145,35 @@ class InfoDict(dict):
     wifiSignalLevel: str
     wifiTxPwrEeprom: str
 
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> InfoDict:
+        """Return the info with the check in time parsed."""
+        info = cls(data)
+        if info.checkedInAt is not None:
+            info.checkedInAt = parse_datetime(  # pylint:disable=invalid-name
+                data["checkedInAt"]
+            )
+        return info
 
-class DeviceDict(dict):
+
+class DeviceDict(Model):
     """Class for device."""
 
+    __slots__ = (
+        "acl",
+        "createdAt",
+        "deviceInviteToken",
+        "id",
+        "location",
+        "name",
+        "resourceId",
+        "status",
+        "type",
+        "updatedAt",
+        "user",
+        "uuid",
+    )
+
     acl: str
     createdAt: str
     deviceInviteToken: str
@@ -47,16 +188,41 @@ class DeviceDict(dict):
     uuid: str
 
 
-class AvatarDict(dict):
+class AvatarDict(Model):
     """Class for avatar."""
 
+    __slots__ = ("createdAt", "url")
+
     createdAt: str
     url: str
 
 
-class SettingsDict(dict):
+class SettingsDict(Model):
     """Class for settings."""
 
+    __slots__ = (
+        "chime_level",
+        "digital_doorbell",
+        "do_not_disturb",
+        "do_not_ring",
+        "green_b",
+        "green_g",
+        "green_r",
+        "high_front_led_dac",
+        "high_lux_threshold",
+        "led_intensity",
+        "low_front_led_dac",
+        "low_lux_threshold",
+        "med_front_led_dac",
+        "med_lux_threshold",
+        "mic_volume",
+        "motion_policy",
+        "motion_threshold",
+        "ring_tone",
+        "speaker_volume",
+        "video_profile",
+    )
+
     chime_level: str | None
     digital_doorbell: str | None
     do_not_disturb: str | None
@@ -79,12 +245,58 @@ class SettingsDict(dict):
     video_profile: str | None
 
 
-class EventDict(dict):
+class DeviceSettings(NamedTuple):
+    """Class for settings converted to their typed values."""
+
+    do_not_disturb: bool = False
+    do_not_ring: bool = False
+    outdoor_chime_level: int = 0
+    motion_sensor: bool = False
+    motion_threshold: int = 0
+    video_profile: int = 0
+    led_rgb: tuple[int, int, int] = (0, 0, 0)
+    led_intensity: int = 0
+
+    @classmethod
+    def from_json(cls, settings: SettingsDict) -> DeviceSettings:
+        """Return the typed values of settings."""
+        return cls(
+            do_not_disturb=str(settings.do_not_disturb).lower() == "true",
+            do_not_ring=str(settings.do_not_ring).lower() == "true",
+            outdoor_chime_level=int(settings.chime_level or 0),
+            motion_sensor=settings.motion_policy == CONST.MOTION_POLICY_ON,
+            motion_threshold=int(settings.motion_threshold or 0),
+            video_profile=int(settings.video_profile or 0),
+            led_rgb=(
+                int(settings.green_r or 0),
+                int(settings.green_g or 0),
+                int(settings.green_b or 0),
+            ),
+            led_intensity=int(settings.led_intensity or 0),
+        )
+
+
+class EventDict(Model):
     """Class for an event."""
 
+    __slots__ = (
+        "_id",
+        "callId",
+        "createdAt",
+        "device",
+        "event",
+        "id",
+        "media",
+        "mediaSmall",
+        "state",
+        "ttlStartDate",
+        "updatedAt",
+        "videoState",
+    )
+
     _id: str
     callId: str
-    createdAt: datetime
+    createdAt: str
     device: str
     event: str
     id: str
@@ -96,6 +308,81 @@ class EventDict(dict):
     videoState: str
 
 
+class ChangesDict(dict):
+    """Class for what a device update changed, per section.
+
+    Each section maps changed fields to their old and new value, events
+    lists the new events. Sections without changes are left out.
+    """
+
+    avatar: dict[str, tuple[Any, Any]]
+    device: dict[str, tuple[Any, Any]]
+    events: list[EventDict]
+    info: dict[str, tuple[Any, Any]]
+    settings: dict[str, tuple[Any, Any]]
+
+
+class HistogramDict(dict):
+    """Class for a histogram of seconds."""
+
+    buckets: dict[float, int]
+    count: int
+    sum: float
+
+
+class EndpointMetricsDict(dict):
+    """Class for the request metrics of an endpoint group."""
+
+    bytes_in: int
+    bytes_out: int
+    coalesced: int
+    connect: HistogramDict
+    count: int
+    dns: HistogramDict
+    latency: HistogramDict
+    relogins: int
+    retries: int
+    statuses: dict[str, int]
+    ttfb: HistogramDict
+
+
+class PollStateDict(dict):
+    """Class for the polling schedule of a device."""
+
+    device_id: str
+    error: Exception | None
+    failures: int
+    interval: float
+    last_elapsed: float
+    mean_elapsed: float
+    next_due: datetime | None
+    polls: int
+
+
+class SpanDict(dict):
+    """Class for a timed tracing span."""
+
+    attributes: dict[str, Any]
+    duration: float
+    error: str | None
+    name: str
+    parent_id: str | None
+    span_id: str
+    start: float
+    trace_id: str
+
+
+class UpdateResultDict(dict):
+    """Class for the outcome of a device update."""
+
+    changes: ChangesDict | None
+    device_id: str
+    elapsed: float
+    error: Exception | None
+    success: bool
+
+
+ChangeCallback = Callable[[str, Any, Any], Optional[Awaitable[None]]]
 EventTypeDict = dict[str, EventDict]
 DeviceTypeDict = dict[str, dict[str, EventTypeDict]]
 DevicesDict = dict[str, DeviceTypeDict]
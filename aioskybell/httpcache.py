@@ -0,0 +1,85 @@
+"""The conditional GET response cache used by AIOSkybell."""
+from __future__ import annotations
+
+import copy
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from .helpers import const as CONST
+
+
+class CachedResponse(NamedTuple):
+    """Class for a response kept with its validators."""
+
+    etag: str | None
+    last_modified: str | None
+    body: Any
+    size: int
+
+
+class ResponseCache:
+    """Class to keep API responses with an ETag or Last-Modified per URL.
+
+    The least recently used responses are dropped once the stored bodies
+    exceed max_size bytes. A max_size of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = CONST.RESPONSE_CACHE_SIZE) -> None:
+        """Set up the response cache."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Return the bytes of all cached response bodies."""
+        return self._size
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """Return the cached response for url if there is one."""
+        if (entry := self._entries.get(url)) is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def hit(self, entry: CachedResponse) -> Any:
+        """Count a 304 and return a copy of the cached body."""
+        self.hits += 1
+        return copy.deepcopy(entry.body)
+
+    def store(  # pylint:disable=too-many-arguments
+        self,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        body: Any,
+        size: int,
+    ) -> None:
+        """Count a full response and cache it if it has validators."""
+        self.misses += 1
+        if old := self._entries.pop(url, None):
+            self._size -= old.size
+        if (etag is None and last_modified is None) or size > self.max_size:
+            return
+        self._entries[url] = CachedResponse(
+            etag, last_modified, copy.deepcopy(body), size
+        )
+        self._size += size
+        while self._size > self.max_size:
+            _, old = self._entries.popitem(last=False)
+            self._size -= old.size
+
+
+def conditional_headers(entry: CachedResponse) -> dict[str, str]:
+    """Return the request headers to revalidate a cached response."""
+    headers = {}
+    if entry.etag is not None:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified is not None:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
@@ -0,0 +1,264 @@
+"""The request metrics used by AIOSkybell."""
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left
+from types import SimpleNamespace
+
+from aiohttp import (  # isort:skip
+    ClientSession,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
+    TraceRequestChunkSentParams,
+    TraceRequestEndParams,
+    TraceRequestStartParams,
+)
+
+from .helpers import const as CONST
+from .helpers.models import EndpointMetricsDict, HistogramDict
+
+_COUNTERS = ("retries", "relogins", "coalesced")
+_SUFFIXES = (
+    ("/video/", CONST.METRIC_VIDEO_URL),
+    ("/avatar/", CONST.METRIC_AVATAR),
+    ("/info/", CONST.METRIC_INFO),
+    ("/settings/", CONST.METRIC_SETTINGS),
+)
+
+
+def endpoint_group(url: str) -> str:
+    """Return the endpoint group a request URL is counted in."""
+    if not url.startswith(CONST.API_URL):
+        return CONST.METRIC_MEDIA
+    if url.startswith(CONST.LOGIN_URL):
+        return CONST.METRIC_LOGIN
+    for suffix, group in _SUFFIXES:
+        if url.endswith(suffix):
+            return group
+    if url.startswith(CONST.DEVICES_URL):
+        if "/activities/" in url:
+            return CONST.METRIC_ACTIVITIES
+        return CONST.METRIC_DEVICES
+    return CONST.METRIC_OTHER
+
+
+class _Histogram:
+    """Class for counts of seconds per bucket."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Set up the histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count a value in its bucket."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> HistogramDict:
+        """Return the cumulative count per upper bound."""
+        buckets, total = {}, 0
+        for bound, count in zip((*self.bounds, math.inf), self.counts):
+            total += count
+            buckets[bound] = total
+        return HistogramDict(buckets=buckets, count=self.count, sum=self.sum)
+
+
+class _Endpoint:  # pylint:disable=too-few-public-methods, too-many-instance-attributes
+    """Class for the metrics of one endpoint group."""
+
+    __slots__ = (
+        "bytes_in",
+        "bytes_out",
+        "coalesced",
+        "connect",
+        "dns",
+        "latency",
+        "relogins",
+        "retries",
+        "statuses",
+        "ttfb",
+    )
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Set up the endpoint metrics."""
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.coalesced = 0
+        self.connect = _Histogram(bounds)
+        self.dns = _Histogram(bounds)
+        self.latency = _Histogram(bounds)
+        self.relogins = 0
+        self.retries = 0
+        self.statuses: dict[str, int] = {}
+        self.ttfb = _Histogram(bounds)
+
+    def snapshot(self) -> EndpointMetricsDict:
+        """Return the metrics as plain values."""
+        return EndpointMetricsDict(
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            coalesced=self.coalesced,
+            connect=self.connect.snapshot(),
+            count=self.latency.count,
+            dns=self.dns.snapshot(),
+            latency=self.latency.snapshot(),
+            relogins=self.relogins,
+            retries=self.retries,
+            statuses=dict(self.statuses),
+            ttfb=self.ttfb.snapshot(),
+        )
+
+
+class Metrics:
+    """Class to record what requests cost per endpoint group.
+
+    Skybell records the count, latency, status class and bytes received of
+    every request, and the retries, re-logins and coalesced hits. The DNS,
+    connect and first byte timings and the bytes sent come from
+    trace_config, which Skybell adds to the session it creates. Pass it in
+    trace_configs when creating your own session.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = CONST.METRICS_BUCKETS) -> None:
+        """Set up the metrics."""
+        self.buckets = buckets
+        self._endpoints: dict[str, _Endpoint] = {}
+        self.trace_config = TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_request_chunk_sent.append(self._on_request_chunk_sent)
+        self.trace_config.on_request_end.append(self._on_request_end)
+        self.trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        self.trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        self.trace_config.on_connection_create_start.append(self._on_connect_start)
+        self.trace_config.on_connection_create_end.append(self._on_connect_end)
+
+    def _endpoint(self, group: str) -> _Endpoint:
+        """Return the metrics of an endpoint group, adding it if new."""
+        if (endpoint := self._endpoints.get(group)) is None:
+            endpoint = self._endpoints[group] = _Endpoint(self.buckets)
+        return endpoint
+
+    def observe(
+        self, url: str, status: int | None, elapsed: float, size: int = 0
+    ) -> None:
+        """Record a request, with a status of None if no response came."""
+        endpoint = self._endpoint(endpoint_group(url))
+        endpoint.latency.observe(elapsed)
+        key = f"{status // 100}xx" if status else "error"
+        endpoint.statuses[key] = endpoint.statuses.get(key, 0) + 1
+        endpoint.bytes_in += size
+
+    def increment(self, url: str, counter: str) -> None:
+        """Count a retry, re-login or coalesced hit of a request."""
+        if counter not in _COUNTERS:
+            raise ValueError(counter)
+        endpoint = self._endpoint(endpoint_group(url))
+        setattr(endpoint, counter, getattr(endpoint, counter) + 1)
+
+    def reset(self) -> None:
+        """Forget all recorded metrics."""
+        self._endpoints = {}
+
+    def snapshot(self) -> dict[str, EndpointMetricsDict]:
+        """Return the metrics per endpoint group."""
+        return {group: item.snapshot() for group, item in self._endpoints.items()}
+
+    def prometheus(self, prefix: str = CONST.METRICS_PREFIX) -> str:
+        """Return the metrics in the Prometheus text format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_requests_total Requests by endpoint and status class.",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        for group, item in snapshot.items():
+            for status, count in item["statuses"].items():
+                lines.append(
+                    f'{prefix}_requests_total{{endpoint="{group}",status="{status}"}}'
+                    f" {count}"
+                )
+        for name, key, text in (
+            ("received_bytes_total", "bytes_in", "Response bytes received."),
+            ("sent_bytes_total", "bytes_out", "Request bytes sent."),
+            ("retries_total", "retries", "Requests sent again after a failure."),
+            ("relogins_total", "relogins", "Logins after an expired token."),
+            ("coalesced_total", "coalesced", "Requests served by one in flight."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for group, item in snapshot.items():
+                lines.append(f'{prefix}_{name}{{endpoint="{group}"}} {item[key]}')
+        for name, key, text in (
+            ("request_duration_seconds", "latency", "Time until the response."),
+            ("dns_duration_seconds", "dns", "Time resolving the host."),
+            ("connect_duration_seconds", "connect", "Time opening a connection."),
+            ("ttfb_seconds", "ttfb", "Time until the response headers."),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for group, item in snapshot.items():
+                histogram = item[key]
+                for bound, count in histogram["buckets"].items():
+                    le = "+Inf" if bound == math.inf else format(bound, "g")
+                    lines.append(
+                        f'{prefix}_{name}_bucket{{endpoint="{group}",le="{le}"}}'
+                        f" {count}"
+                    )
+                lines.append(
+                    f'{prefix}_{name}_sum{{endpoint="{group}"}} {histogram["sum"]}'
+                )
+                lines.append(
+                    f'{prefix}_{name}_count{{endpoint="{group}"}} {histogram["count"]}'
+                )
+        return "\n".join(lines) + "\n"
+
+    async def _on_request_start(
+        self, _: ClientSession, ctx: SimpleNamespace, params: TraceRequestStartParams
+    ) -> None:
+        ctx.endpoint = self._endpoint(endpoint_group(str(params.url)))
+        ctx.start = time.monotonic()
+
+    async def _on_request_chunk_sent(
+        self,
+        _: ClientSession,
+        ctx: SimpleNamespace,
+        params: TraceRequestChunkSentParams,
+    ) -> None:
+        ctx.endpoint.bytes_out += len(params.chunk)
+
+    async def _on_request_end(
+        self, _: ClientSession, ctx: SimpleNamespace, __: TraceRequestEndParams
+    ) -> None:
+        ctx.endpoint.ttfb.observe(time.monotonic() - ctx.start)
+
+    async def _on_dns_start(
+        self, _: ClientSession, ctx: SimpleNamespace, __: TraceDnsResolveHostStartParams
+    ) -> None:
+        ctx.dns_start = time.monotonic()
+
+    async def _on_dns_end(
+        self, _: ClientSession, ctx: SimpleNamespace, __: TraceDnsResolveHostEndParams
+    ) -> None:
+        ctx.endpoint.dns.observe(time.monotonic() - ctx.dns_start)
+
+    async def _on_connect_start(
+        self,
+        _: ClientSession,
+        ctx: SimpleNamespace,
+        __: TraceConnectionCreateStartParams,
+    ) -> None:
+        ctx.connect_start = time.monotonic()
+
+    async def _on_connect_end(
+        self, _: ClientSession, ctx: SimpleNamespace, __: TraceConnectionCreateEndParams
+    ) -> None:
+        ctx.endpoint.connect.observe(time.monotonic() - ctx.connect_start)
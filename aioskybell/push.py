@@ -0,0 +1,160 @@
+"""The push event listener used by AIOSkybell."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import random
+from asyncio.exceptions import TimeoutError as Timeout
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import WSMsgType
+from aiohttp.client_exceptions import ClientError
+
+from .exceptions import SkybellException
+from .helpers import const as CONST
+from .helpers import errors as ERROR
+from .helpers.models import EventDict
+
+if TYPE_CHECKING:
+    from . import Skybell
+
+_LOGGER = logging.getLogger(__name__)
+
+_ACTIVITY_KEYS = {CONST.ID, CONST.EVENT, CONST.CREATED_AT}
+
+
+class PushListener:  # pylint:disable=too-many-instance-attributes
+    """Class to receive device activities over a Socket.IO connection.
+
+    The app is registered for socketio push, then a websocket is held open
+    speaking just enough Engine.IO and Socket.IO to answer pings and read
+    events. Event arguments that look like an activity are added to the
+    device they belong to. A dropped connection is reopened with backoff,
+    registering the app again first.
+    """
+
+    def __init__(self, skybell: Skybell, url: str = CONST.PUSH_URL) -> None:
+        """Set up the push listener."""
+        self.url = url
+        self.activities = 0
+        self.connects = 0
+        self._connected = False
+        self._failures = 0
+        self._skybell = skybell
+        self._task: asyncio.Future[None] | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return if the Socket.IO connection is open."""
+        return self._connected
+
+    @property
+    def running(self) -> bool:
+        """Return if the listener is started."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start listening in the background."""
+        if not self.running:
+            self._task = asyncio.ensure_future(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self._connected = False
+
+    async def _async_run(self) -> None:
+        """Keep a connection open, reconnecting with backoff."""
+        while True:
+            try:
+                await self._async_register()
+                await self._async_listen()
+            except (ClientError, SkybellException, Timeout, ValueError) as ex:
+                _LOGGER.warning("Push connection failed: %s", ex)
+            except Exception:  # pylint:disable=broad-except
+                _LOGGER.exception("Unexpected error in the push connection")
+            self._connected = False
+            delay = min(
+                CONST.PUSH_RECONNECT_DELAY * 2**self._failures,
+                CONST.PUSH_RECONNECT_MAX_DELAY,
+            )
+            if delay < CONST.PUSH_RECONNECT_MAX_DELAY:
+                self._failures += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1))
+
+    async def _async_register(self) -> None:
+        """Register the app to receive events by socketio."""
+        await self._skybell.async_send_request(
+            CONST.REGISTER_URL,
+            json={
+                "appId": self._skybell.cache(CONST.APP_ID),
+                "protocol": CONST.PUSH_PROTOCOL,
+                CONST.TOKEN: self._skybell.cache(CONST.TOKEN),
+            },
+            method=CONST.HTTPMethod.POST,
+        )
+
+    async def _async_listen(self) -> None:
+        """Open the websocket and handle packets until it closes."""
+        # pylint:disable=protected-access
+        async with self._skybell._session.ws_connect(
+            self.url,
+            params={"EIO": CONST.PUSH_ENGINEIO_VERSION, "transport": "websocket"},
+            headers=self._skybell._api_headers(),
+        ) as socket:
+            timeout: float = CONST.PUSH_OPEN_TIMEOUT
+            while True:
+                message = await socket.receive(timeout)
+                if message.type is not WSMsgType.TEXT:
+                    return
+                kind, data = message.data[:1], message.data[1:]
+                if kind == "0":
+                    # Engine.IO open, the server pings within the interval
+                    handshake = json.loads(data)
+                    timeout = handshake["pingInterval"] + handshake["pingTimeout"]
+                    timeout /= 1000
+                    await socket.send_str("40")
+                elif kind == "2":
+                    await socket.send_str("3" + data)
+                elif kind == "1":
+                    return
+                elif kind == "4" and not await self._async_message(data):
+                    return
+
+    async def _async_message(self, packet: str) -> bool:
+        """Handle a Socket.IO packet and return if the connection stays open."""
+        kind, data = packet[:1], packet[1:]
+        if kind == "0":
+            _LOGGER.debug("Push connected")
+            self._connected = True
+            self._failures = 0
+            self.connects += 1
+        elif kind == "1":
+            return False
+        elif kind == "4":
+            raise SkybellException(ERROR.PUSH_FAILED, data)
+        elif kind == "2":
+            # Skip the namespace and ack id in front of the event array
+            _, *args = json.loads(data[data.index("[") :])
+            await self._async_event(args)
+        return True
+
+    async def _async_event(self, args: list[Any]) -> None:
+        """Add the activities in the arguments of an event to their device."""
+        for arg in args:
+            if not isinstance(arg, dict) or not _ACTIVITY_KEYS <= arg.keys():
+                continue
+            activity = EventDict.from_json(arg)
+            try:
+                device = await self._skybell.async_get_device(activity.device)
+                new = await device.async_add_activities([activity])
+            except Exception as ex:  # pylint:disable=broad-except
+                _LOGGER.warning("Ignoring pushed activity %s: %s", activity.id, ex)
+                continue
+            self.activities += len(new)
@@ -0,0 +1,67 @@
+"""The rate limiter used by AIOSkybell."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class TokenBucket:  # pylint:disable=too-many-instance-attributes
+    """Class to limit how fast requests are sent with a token bucket.
+
+    The bucket refills at rate tokens per second up to burst tokens and each
+    request takes one. A rate of None disables the limit. Both can be changed
+    at any time.
+    """
+
+    def __init__(self, rate: float | None = None, burst: float = 1) -> None:
+        """Set up the token bucket."""
+        self.rate = rate
+        self.burst = burst
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self._lock = asyncio.Lock()
+        self._queued = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return self._queued
+
+    async def async_acquire(self) -> float:
+        """Wait for a token and return the seconds spent waiting."""
+        if self.rate is None:
+            self.acquired += 1
+            return 0.0
+
+        start = time.monotonic()
+        delayed = self._lock.locked()
+        self._queued += 1
+        try:
+            async with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens < 1:
+                    delayed = True
+                    delay = (1 - self._tokens) / self.rate
+                    await asyncio.sleep(delay)
+                    self._tokens = 1.0
+                    self._updated = now + delay
+                self._tokens -= 1
+        finally:
+            self._queued -= 1
+
+        self.acquired += 1
+        if not delayed:
+            return 0.0
+        waited = time.monotonic() - start
+        self.waits += 1
+        self.wait_time += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
@@ -0,0 +1,106 @@
+"""The retry policy used by AIOSkybell."""
+from __future__ import annotations
+
+import random
+from asyncio.exceptions import TimeoutError as Timeout
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from aiohttp.client_exceptions import (  # isort:skip
+    ClientConnectionError,
+    ClientPayloadError,
+    ClientResponseError,
+)
+
+from .helpers import const as CONST
+
+
+class RetryPolicy:  # pylint:disable=too-many-instance-attributes
+    """Class to decide which failed requests are retried and when.
+
+    Subclass and override the methods to change the behaviour. The retry
+    budget lives on the instance, so give each client its own policy.
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+        self,
+        attempts: int = CONST.RETRY_ATTEMPTS,
+        backoff: float = CONST.RETRY_BACKOFF,
+        max_backoff: float = CONST.RETRY_MAX_BACKOFF,
+        jitter: float = CONST.RETRY_JITTER,
+        max_retry_after: float = CONST.RETRY_MAX_RETRY_AFTER,
+        budget: float = CONST.RETRY_BUDGET,
+        budget_refill: float = CONST.RETRY_BUDGET_REFILL,
+        statuses: tuple[int, ...] = CONST.RETRY_STATUSES,
+        exceptions: tuple[type[BaseException], ...] = (
+            ClientConnectionError,
+            ClientPayloadError,
+            Timeout,
+        ),
+    ) -> None:
+        """Set up the retry policy."""
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self.budget = budget
+        self.budget_refill = budget_refill
+        self.statuses = statuses
+        self.exceptions = exceptions
+        self._tokens = budget
+
+    @property
+    def tokens(self) -> float:
+        """Return the retries left in the budget."""
+        return self._tokens
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Return if the failed request may be sent again."""
+        if isinstance(error, ClientResponseError):
+            return error.status in self.statuses
+        return isinstance(error, self.exceptions)
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float | None:
+        """Return seconds to wait before the next attempt, None to give up."""
+        if attempt >= self.attempts:
+            return None
+        if (wait := parse_retry_after(retry_after)) is not None:
+            return wait if wait <= self.max_retry_after else None
+        wait = min(self.backoff * 2**attempt, self.max_backoff)
+        return wait + random.uniform(0, wait * self.jitter)
+
+    def acquire(self) -> bool:
+        """Take one retry from the budget, False if it is spent."""
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def record_success(self) -> None:
+        """Refill the budget a little after a successful request."""
+        self._tokens = min(self.budget, self._tokens + self.budget_refill)
+
+
+def get_retry_after(error: BaseException) -> str | None:
+    """Return the Retry-After header of a failed response if there is one."""
+    if isinstance(error, ClientResponseError) and error.headers:
+        return error.headers.get("Retry-After")
+    return None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,135 @@
+"""The polling scheduler used by AIOSkybell."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any
+
+from .helpers import const as CONST
+from .helpers.models import PollStateDict
+
+if TYPE_CHECKING:
+    from .device import SkybellDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:  # pylint:disable=too-many-instance-attributes
+    """Class to update each device on its own adaptive interval.
+
+    Devices with a motion or button event in the last active_window seconds
+    are polled every active_interval seconds, others every interval seconds.
+    A device that is down, refused its info or failed to update backs off,
+    doubling its interval per failed poll up to max_interval. Every interval
+    is spread by the jitter fraction so devices do not poll in step.
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+        self,
+        interval: float = CONST.POLL_INTERVAL,
+        active_interval: float = CONST.POLL_ACTIVE_INTERVAL,
+        active_window: float = CONST.POLL_ACTIVE_WINDOW,
+        max_interval: float = CONST.POLL_MAX_INTERVAL,
+        jitter: float = CONST.POLL_JITTER,
+        concurrency: int = CONST.UPDATE_ALL_CONCURRENCY,
+        **kwargs: Any,
+    ) -> None:
+        """Set up the polling scheduler.
+
+        Keyword arguments are passed to each device update. The device is
+        fetched on each poll unless get_devices is False, so the backoff sees
+        its current status.
+        """
+        self.interval = interval
+        self.active_interval = active_interval
+        self.active_window = active_window
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self._kwargs = {"get_devices": True, **kwargs}
+        self._schedule: dict[str, PollStateDict] = {}
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._tasks: dict[str, asyncio.Future[None]] = {}
+
+    @property
+    def schedule(self) -> dict[str, PollStateDict]:
+        """Return the next due time and poll costs per device."""
+        return self._schedule
+
+    @property
+    def running(self) -> bool:
+        """Return if devices are being polled."""
+        return any(not task.done() for task in self._tasks.values())
+
+    def start(self, devices: list[SkybellDevice]) -> None:
+        """Start polling devices not polled yet."""
+        for device in devices:
+            if (task := self._tasks.get(device.device_id)) and not task.done():
+                continue
+            self._schedule[device.device_id] = PollStateDict(
+                device_id=device.device_id,
+                error=None,
+                failures=0,
+                interval=self.interval,
+                last_elapsed=0.0,
+                mean_elapsed=0.0,
+                next_due=None,
+                polls=0,
+            )
+            self._tasks[device.device_id] = asyncio.ensure_future(
+                self._async_poll(device)
+            )
+
+    async def async_stop(self) -> None:
+        """Stop polling all devices."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+
+    def next_interval(self, device: SkybellDevice, failures: int = 0) -> float:
+        """Return the seconds until the next poll of a device, before jitter."""
+        if failures:
+            # Past 64 doublings any interval is capped, and 2**failures
+            # would overflow a float
+            return min(self.interval * 2 ** min(failures, 64), self.max_interval)
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.active_window)
+        for event in (CONST.EVENT_MOTION, CONST.EVENT_BUTTON):
+            if device.activities(event=event, since=since):
+                return self.active_interval
+        return self.interval
+
+    def _jitter(self, interval: float) -> float:
+        """Return the interval spread by the jitter fraction."""
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _async_poll(self, device: SkybellDevice) -> None:
+        """Update a device whenever it is due."""
+        state = self._schedule[device.device_id]
+        # Spread the first polls so a fleet does not start in step
+        delay = random.uniform(0, self.interval * self.jitter)
+        while True:
+            state["next_due"] = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            async with self._semaphore:
+                start = time.monotonic()
+                try:
+                    await device.async_update(**self._kwargs)
+                except Exception as ex:  # pylint:disable=broad-except
+                    _LOGGER.warning("Failed to poll %s: %s", device.device_id, ex)
+                    state["error"] = ex
+                else:
+                    state["error"] = None
+                elapsed = time.monotonic() - start
+
+            state["polls"] += 1
+            state["last_elapsed"] = elapsed
+            state["mean_elapsed"] += (elapsed - state["mean_elapsed"]) / state["polls"]
+            if state["error"] or not device.is_up or device.info_forbidden:
+                state["failures"] += 1
+            else:
+                state["failures"] = 0
+            state["interval"] = self.next_interval(device, state["failures"])
+            delay = self._jitter(state["interval"])
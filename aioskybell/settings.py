@@ -0,0 +1,122 @@
+"""The settings schema used by AIOSkybell."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from .exceptions import SkybellException
+from .helpers import const as CONST
+from .helpers import errors as ERROR
+
+
+class SettingSchema(NamedTuple):
+    """Class for how a setting is validated, typed and sent.
+
+    coerce returns the typed value as kept in DeviceSettings under attribute,
+    raising TypeError or ValueError for an invalid value. wire turns the
+    typed value into the values sent for each of fields.
+    """
+
+    attribute: str
+    fields: tuple[str, ...]
+    coerce: Callable[[Any], Any]
+    wire: Callable[[Any], tuple[Any, ...]]
+
+    def encode(self, key: str, value: Any) -> tuple[Any, dict[str, Any]]:
+        """Return the typed value and the settings to send for it."""
+        try:
+            typed = self.coerce(value)
+        except (TypeError, ValueError) as ex:
+            raise SkybellException(ERROR.INVALID_SETTING_VALUE, (key, value)) from ex
+        return typed, dict(zip(self.fields, self.wire(typed)))
+
+
+def _bool_string(value: Any) -> bool:
+    """Return a boolean given as True or False."""
+    if str(value) not in CONST.BOOL_STRINGS:
+        raise ValueError(value)
+    return str(value) == "True"
+
+
+def _choice(values: list[int]) -> Callable[[Any], int]:
+    """Return a coercion to one of the integer values."""
+
+    def coerce(value: Any) -> int:
+        if (number := int(value)) not in values:
+            raise ValueError(value)
+        return number
+
+    return coerce
+
+
+def _range(bounds: list[int]) -> Callable[[Any], int]:
+    """Return a coercion to an integer within the bounds."""
+
+    def coerce(value: Any) -> int:
+        if not bounds[0] <= (number := int(value)) <= bounds[1]:
+            raise ValueError(value)
+        return number
+
+    return coerce
+
+
+def _rgb(value: Any) -> tuple[int, int, int]:
+    """Return a color given as three integers."""
+    if not isinstance(value, (list, tuple)) or len(value) != 3:
+        raise TypeError(value)
+    if not all(isinstance(item, int) for item in value):
+        raise TypeError(value)
+    color = _range(CONST.LED_VALUES)
+    return (color(value[0]), color(value[1]), color(value[2]))
+
+
+_BRIGHTNESS = SettingSchema(
+    "led_intensity",
+    (CONST.BRIGHTNESS,),
+    _range(CONST.BRIGHTNESS_VALUES),
+    lambda value: (value,),
+)
+_MOTION_POLICY = SettingSchema(
+    "motion_sensor",
+    (CONST.MOTION_POLICY,),
+    bool,
+    lambda value: (CONST.MOTION_POLICY_ON if value else CONST.MOTION_POLICY_OFF,),
+)
+
+SETTINGS: dict[str, SettingSchema] = {
+    CONST.DO_NOT_DISTURB: SettingSchema(
+        "do_not_disturb",
+        (CONST.DO_NOT_DISTURB,),
+        _bool_string,
+        lambda value: (str(value),),
+    ),
+    CONST.DO_NOT_RING: SettingSchema(
+        "do_not_ring",
+        (CONST.DO_NOT_RING,),
+        _bool_string,
+        lambda value: (str(value),),
+    ),
+    CONST.MOTION_POLICY: _MOTION_POLICY,
+    "motion_sensor": _MOTION_POLICY,
+    CONST.RGB_COLOR: SettingSchema("led_rgb", tuple(CONST.LED_COLORS), _rgb, tuple),
+    CONST.OUTDOOR_CHIME: SettingSchema(
+        "outdoor_chime_level",
+        (CONST.OUTDOOR_CHIME,),
+        _choice(CONST.OUTDOOR_CHIME_VALUES),
+        lambda value: (value,),
+    ),
+    CONST.MOTION_THRESHOLD: SettingSchema(
+        "motion_threshold",
+        (CONST.MOTION_THRESHOLD,),
+        _choice(CONST.MOTION_THRESHOLD_VALUES),
+        lambda value: (value,),
+    ),
+    CONST.VIDEO_PROFILE: SettingSchema(
+        "video_profile",
+        (CONST.VIDEO_PROFILE,),
+        _choice(CONST.VIDEO_PROFILE_VALUES),
+        lambda value: (value,),
+    ),
+    CONST.BRIGHTNESS: _BRIGHTNESS,
+    "brightness": _BRIGHTNESS,
+}
@@ -0,0 +1,77 @@
+"""The tracing spans used by AIOSkybell."""
+from __future__ import annotations
+
+import contextlib
+import logging
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from typing import Any, ContextManager
+
+from .helpers.models import SpanDict
+
+_LOGGER = logging.getLogger(__name__)
+
+_CURRENT: ContextVar[SpanDict | None] = ContextVar("aioskybell_span", default=None)
+_DISABLED: ContextManager[None] = contextlib.nullcontext()
+
+SpanExporter = Callable[[SpanDict], None]
+
+
+def current_span() -> SpanDict | None:
+    """Return the span the running code is in."""
+    return _CURRENT.get()
+
+
+class Tracer:  # pylint:disable=too-few-public-methods
+    """Class to time operations as spans and pass them to an exporter.
+
+    A span started inside another one, also from a task created within it,
+    becomes its child and shares its trace id. Each span is exported when it
+    ends, so children arrive before their parent. Without an exporter no
+    spans are made.
+    """
+
+    def __init__(self, exporter: SpanExporter | None = None) -> None:
+        """Set up the tracer."""
+        self.exporter = exporter
+
+    def span(self, name: str, **attributes: Any) -> ContextManager[None]:
+        """Return a context manager timing the code inside it as a span."""
+        if self.exporter is None:
+            return _DISABLED
+        return self._span(self.exporter, name, attributes)
+
+    @contextlib.contextmanager
+    def _span(
+        self, exporter: SpanExporter, name: str, attributes: dict[str, Any]
+    ) -> Iterator[None]:
+        """Time a span and export it."""
+        parent = _CURRENT.get()
+        span = SpanDict(
+            attributes=attributes,
+            duration=0.0,
+            error=None,
+            name=name,
+            parent_id=parent["span_id"] if parent else None,
+            span_id=f"{random.getrandbits(64):016x}",
+            start=time.time(),
+            trace_id=parent["trace_id"]
+            if parent
+            else f"{random.getrandbits(128):032x}",
+        )
+        token = _CURRENT.set(span)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as ex:
+            span["error"] = type(ex).__name__
+            raise
+        finally:
+            span["duration"] = time.perf_counter() - start
+            _CURRENT.reset(token)
+            try:
+                exporter(span)
+            except Exception:  # pylint:disable=broad-except
+                _LOGGER.exception("Error exporting span %s", name)
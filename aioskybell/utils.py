@@ -1,14 +1,22 @@
 """AIOSkybell utility methods."""
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import io
+import json
+import os
 import pickle
 import random
 import string
+import tempfile
 import uuid
-from typing import Any
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Awaitable, Callable
 
 import aiofiles
 
+from .helpers import const as CONST
 from .helpers.models import EventTypeDict
 
 
@@ -16,20 +24,61 @@ async def async_save_cache(
     data: dict[str, str | dict[str, EventTypeDict]],
     filename: str,
 ) -> None:
-    """Save cache from file."""
-    async with aiofiles.open(filename, "wb") as file:
-        pickled_foo = pickle.dumps(data)
-        await file.write(pickled_foo)
+    """Save cache to file.
+
+    The versioned state is written to a temporary file that is synced and
+    then renamed over the cache, so a crash never leaves a partial file.
+    """
+    content = json.dumps(
+        {CONST.CACHE_VERSION_KEY: CONST.CACHE_VERSION, CONST.CACHE_DATA_KEY: data},
+        separators=(",", ":"),
+        default=str,
+    ).encode()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _write_atomic, filename, content)
+
+
+def _write_atomic(filename: str, content: bytes) -> None:
+    """Replace filename with content in one step."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    handle, temp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, filename)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_name)
+        raise
 
 
 async def async_load_cache(
     filename: str,
 ) -> dict[str, str | dict[str, dict[str, dict[str, dict[str, str]]]]]:
-    """Load cache from file."""
+    """Load cache from file.
+
+    Files written before the versioned format are pickles and are still
+    read, but only plain built-in containers are accepted from them.
+    """
     async with aiofiles.open(filename, "rb") as file:
-        pickled_foo = await file.read()
+        content = await file.read()
 
-    return pickle.loads(pickled_foo)
+    if content.startswith(b"{"):
+        state = json.loads(content)
+        if state.get(CONST.CACHE_VERSION_KEY) != CONST.CACHE_VERSION:
+            raise ValueError(f"Unsupported cache version in {filename}")
+        return state[CONST.CACHE_DATA_KEY]
+    return _CacheUnpickler(io.BytesIO(content)).load()
+
+
+class _CacheUnpickler(pickle.Unpickler):
+    """Unpickler that refuses to import anything."""
+
+    def find_class(self, module: str, name: str) -> Any:
+        """Refuse to load classes from legacy cache files."""
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name}")
 
 
 def gen_id() -> str:
@@ -45,16 +94,57 @@ def gen_token() -> str:
     )
 
 
+async def async_gather_limited(
+    limit: int,
+    *jobs: Callable[[], Awaitable[Any]] | None,
+) -> list[Any]:
+    """Run jobs with at most limit in flight and return results in order.
+
+    Jobs are passed uncalled so nothing starts before a slot is free. A job
+    of None is skipped and yields None. A limit of 1 or less runs the jobs
+    one after another.
+    """
+    if limit <= 1:
+        return [await job() if job else None for job in jobs]
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _async_run(job: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            return await job()
+
+    tasks = [asyncio.ensure_future(_async_run(job)) for job in jobs if job]
+    try:
+        results = iter(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [next(results) if job else None for job in jobs]
+
+
 def update(
-    dct: dict[str, Any],
-    dct_merge: dict[str, Any],
-) -> dict[str, Any]:
-    """Recursively merge dicts."""
-    if not isinstance(dct, dict):
+    dct: MutableMapping[str, Any],
+    dct_merge: Mapping[str, Any],
+) -> MutableMapping[str, Any]:
+    """Recursively merge dicts and models."""
+    if not isinstance(dct, MutableMapping):
         return dct
     for key, value in dct_merge.items():
-        if key in dct and isinstance(dct[key], dict):
+        if key in dct and isinstance(dct[key], MutableMapping):
             dct[key] = update(dct[key], value)
         else:
             dct[key] = value
     return dct
+
+
+def diff(
+    old: Mapping[str, Any],
+    new: Mapping[str, Any],
+) -> dict[str, tuple[Any, Any]]:
+    """Return the old and new value of each key that differs."""
+    return {
+        key: (old.get(key), new.get(key))
+        for key in {**old, **new}
+        if old.get(key) != new.get(key)
+    }
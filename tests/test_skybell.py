@@ -1,4 +1,4 @@
-# pylint:disable=line-too-long, protected-access, too-many-statements
+# pylint:disable=line-too-long, protected-access, too-many-lines, too-many-statements, unnecessary-dunder-call
 """
 Test Skybell device functionality.
 
@@ -6,20 +6,33 @@ Tests the device initialization and attributes of the Skybell device class.
 """
 import asyncio
 import datetime as dt
+import json
+import math
 import os
+import pickle
+import time
 from asyncio.exceptions import TimeoutError as Timeout
 from unittest.mock import patch
 
 import aiofiles
 import pytest
-from aiohttp import ClientConnectorError
+from aiohttp import ClientConnectorError, ClientSession, web
 from aresponses import ResponsesMockServer
 from freezegun.api import FrozenDateTimeFactory
 
 from aioskybell import Skybell, exceptions
 from aioskybell import utils as UTILS
 from aioskybell.device import SkybellDevice
+from aioskybell.endpoints import DeviceEndpoints
+from aioskybell.events import EventQueue, EventStore
 from aioskybell.helpers import const as CONST
+from aioskybell.helpers.models import EventDict, InfoDict, SettingsDict
+from aioskybell.httpcache import ResponseCache
+from aioskybell.metrics import Metrics, endpoint_group
+from aioskybell.ratelimit import TokenBucket
+from aioskybell.retry import RetryPolicy
+from aioskybell.scheduler import PollScheduler
+from aioskybell.tracing import SpanDict, Tracer, current_span
 from tests import EMAIL, PASSWORD, load_fixture
 
 
@@ -365,7 +378,6 @@ async def test_get_devices(
     device_activities(aresponses, device.device_id)
     avatar_camera_image(aresponses, device.device_id)
     activity_camera_image(aresponses, device.device_id)
-    activity_camera_image(aresponses, device.device_id)
     await client.async_get_device("012345670123456789abcdef", refresh=True)
 
     devices_response(aresponses)
@@ -388,10 +400,12 @@ async def test_get_devices(
     assert device.images == {"activity": None}
     for dev in await client.async_get_devices(refresh=True):
         assert isinstance(dev, SkybellDevice)
+    for result in (await client.async_update_all(concurrency=1)).values():
+        assert result["success"] is True
     new_activity(aresponses, device.device_id)
-    assert device._activities[0][CONST.ID] == "1234567890ab1234567890ab"
+    assert device.activities()[0][CONST.ID] == "1234567890ab1234567890ab"
     assert (
-        device._activities[0][CONST.MEDIA_URL]
+        device.activities()[0][CONST.MEDIA_URL]
         == "https://skybell-thumbnails-stage.s3.amazonaws.com/012345670123456789abcdef/1646859244793-951012345670123456789abcdef_012345670123456789abcdef.jpeg?Expires=1585575303"
     )
     assert device.images == {"activity": b"\x00\x00", "avatar": b"\x00"}
@@ -402,14 +416,19 @@ async def test_get_devices(
     new_activity_camera_image(aresponses, "012345670123456789abcdef")
     await device._async_update_activities()
     assert device.images == {"activity": b"\x00\x00\x00", "avatar": b"\x00"}
-    assert device._activities[0][CONST.ID] == "1234567890ab1234567890ac"
+    assert device.activities()[0][CONST.ID] == "1234567890ab1234567890ac"
     assert (
-        device._activities[0][CONST.MEDIA_URL]
+        device.activities()[0][CONST.MEDIA_URL]
         == "https://skybell-thumbnails-stage.s3.amazonaws.com/012345670123456789abcdef/1646859244794-951012345670123456789abcdef_012345670123456789abcdef.jpeg?Expires=1585575303"
     )
 
-    login_response(aresponses)
-    with pytest.raises(exceptions.SkybellException):
+    # Known activities only refresh their presigned URLs, with no download
+    fresh = device.latest() | {CONST.MEDIA_URL: "https://example.com/fresh.jpeg"}
+    assert not await device._async_update_activities([fresh])
+    assert device.latest().media == "https://example.com/fresh.jpeg"
+    assert device.images == {"activity": b"\x00\x00\x00", "avatar": b"\x00"}
+
+    with patch("aioskybell.asyncio.sleep"), pytest.raises(exceptions.SkybellException):
         await client.async_get_device(device.device_id, refresh=True)
 
     activity_video(aresponses, device.device_id, "1234567890ab1234567890ac")
@@ -479,23 +498,304 @@ async def test_errors(aresponses: ResponsesMockServer, client: Skybell) -> None:
     with pytest.raises(exceptions.SkybellAuthenticationException):
         await Skybell().async_login()
 
-    login_response(aresponses)
-    login_response(aresponses)
     with patch("aioskybell.asyncio.sleep"), pytest.raises(exceptions.SkybellException):
         await client.async_get_devices()
 
-    login_response(aresponses)
     with patch("aioskybell.asyncio.sleep"), pytest.raises(exceptions.SkybellException):
         await client.async_send_request(
             "https://skybell-thumbnails-stage.s3.amazonaws.com"
         )
 
+    await client._session.close()
     loop = asyncio.get_running_loop()
     loop.run_in_executor(None, os.remove(client._cache_path))
 
     assert not aresponses.assert_no_unused_routes()
 
 
+@pytest.mark.asyncio
+async def test_single_flight_login(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test concurrent callers share one login."""
+    login_response(aresponses)
+    assert await asyncio.gather(*(client.async_login() for _ in range(3))) == [
+        True,
+        True,
+        True,
+    ]
+
+    for path in ("/api/v3/devices/", "/api/v3/users/me/"):
+        aresponses.add(
+            "cloud.myskybell.com",
+            path,
+            "get",
+            aresponses.Response(status=401),
+        )
+    login_response(aresponses)
+    devices_response(aresponses)
+    users_me(aresponses)
+    devices, user = await asyncio.gather(
+        client.async_send_request(CONST.DEVICES_URL),
+        client.async_send_request(CONST.USERS_ME_URL),
+    )
+    assert len(devices) == 3
+    assert user["id"] == "1234567890abcdef12345678"
+    assert client._cache["access_token"] == "superlongkey"
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_login_readiness(
+    aresponses: ResponsesMockServer, apisession: ClientSession
+) -> None:
+    """Test probing for readiness after login."""
+    client = Skybell(EMAIL, PASSWORD, session=apisession)
+    assert client.login_ready_time is None
+    login_response(aresponses)
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/users/me/",
+        "get",
+        aresponses.Response(status=401),
+    )
+    users_me(aresponses)
+    with patch("aioskybell.asyncio.sleep") as sleep:
+        assert await client.async_login() is True
+    sleep.assert_awaited_once_with(CONST.LOGIN_READY_DELAY)
+    assert client.login_ready_time is not None
+    assert client.user_id == "1234567890abcdef12345678"
+
+    login_response(aresponses)
+    with patch("aioskybell.asyncio.sleep") as sleep:
+        assert await client.async_login() is True
+    assert sum(call.args[0] for call in sleep.await_args_list) >= 5
+
+    # Initializing reuses the user fetched by the readiness probe
+    client = Skybell(
+        EMAIL, PASSWORD, auto_login=True, disable_cache=True, session=apisession
+    )
+    login_response(aresponses)
+    users_me(aresponses)
+    devices_response(aresponses)
+    assert len(await client.async_initialize()) == 3
+    assert client.user_id == "1234567890abcdef12345678"
+    assert client.metrics.snapshot()["other"]["count"] == 1
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_retry_policy(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test retrying transient failures."""
+    login_response(aresponses)
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(status=503, headers={"Retry-After": "0"}),
+    )
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(status=500),
+    )
+    devices_response(aresponses)
+    with patch("aioskybell.asyncio.sleep") as sleep:
+        assert len(await client.async_send_request(CONST.DEVICES_URL)) == 3
+    assert sleep.await_count == 2
+    assert sleep.await_args_list[0].args[0] == 0
+    assert client._retry_policy.tokens == 8.1
+
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(status=400),
+    )
+    with pytest.raises(exceptions.SkybellException):
+        await client.async_send_request(CONST.DEVICES_URL)
+
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(status=401),
+        repeat=2,
+    )
+    login_response(aresponses)
+    with pytest.raises(exceptions.SkybellAuthenticationException):
+        await client.async_send_request(CONST.DEVICES_URL)
+
+    with patch("aioskybell.ClientSession.request", side_effect=Timeout), pytest.raises(
+        exceptions.SkybellException
+    ):
+        await client.async_send_request(CONST.DEVICES_URL, retry=False)
+
+    policy = RetryPolicy(budget=1, jitter=0)
+    assert policy.is_retryable(Timeout())
+    assert not policy.is_retryable(ValueError())
+    assert policy.delay(0) == 0.5
+    assert policy.delay(1) == 1
+    assert policy.delay(3) is None
+    assert policy.delay(0, "5") == 5
+    assert policy.delay(0, "60") is None
+    assert policy.delay(0, "Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert policy.delay(0, "Wed, 21 Oct 2015 07:28:00") == 0
+    assert policy.delay(0, "soon") == 0.5
+    assert policy.acquire() is True
+    assert policy.acquire() is False
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_rate_limit(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test rate limiting requests."""
+    api = client.rate_limiters[CONST.RATE_LIMIT_API]
+    media = client.rate_limiters[CONST.RATE_LIMIT_MEDIA]
+    api.rate = 20
+    login_response(aresponses)
+    devices_response(aresponses)
+    devices_response(aresponses)
+    avatar_camera_image(aresponses, "012345670123456789abcdef")
+    await client.async_send_request(CONST.DEVICES_URL)
+    await client.async_send_request(CONST.DEVICES_URL)
+    await client.async_send_request(
+        "https://v3-production-devices-avatar.s3-us-west-2.amazonaws.com/012345670123456789abcdef.jpg"
+    )
+    assert api.acquired == 3
+    assert api.waits == 2
+    assert 0 < api.max_wait <= api.wait_time
+    assert api.queued == 0
+    assert media.acquired == 1
+    assert media.waits == 0
+
+    bucket = TokenBucket(rate=1000, burst=2)
+    assert await bucket.async_acquire() == 0
+    assert await bucket.async_acquire() == 0
+    assert await bucket.async_acquire() > 0
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_coalesce_requests(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test identical requests in flight are sent once."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    results = await asyncio.gather(
+        *(client.async_send_request(CONST.DEVICES_URL) for _ in range(3))
+    )
+    assert results[0] == results[1] == results[2]
+    assert results[0] is not results[1]
+    assert client.metrics.snapshot()["devices"]["coalesced"] == 2
+    assert not client._inflight
+
+    devices_response(aresponses)
+    devices_response(aresponses)
+    await asyncio.gather(
+        client.async_send_request(CONST.DEVICES_URL),
+        client.async_send_request(CONST.DEVICES_URL, headers={"accept": "*/*"}),
+    )
+    assert client.metrics.snapshot()["devices"]["coalesced"] == 2
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test revalidating cached responses."""
+    url = CONST.DEVICE_SETTINGS_URL.replace("$DEVID$", "012345670123456789abcdef")
+    login_response(aresponses)
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/012345670123456789abcdef/settings/",
+        "get",
+        aresponses.Response(
+            status=200,
+            headers={
+                "Content-Type": "application/json",
+                "ETag": '"abc"',
+                "Last-Modified": "yesterday",
+            },
+            text=load_fixture("device-settings.json"),
+        ),
+    )
+
+    def _not_modified(request) -> aresponses.Response:
+        assert request.headers["If-None-Match"] == '"abc"'
+        assert request.headers["If-Modified-Since"] == "yesterday"
+        return aresponses.Response(status=304)
+
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/012345670123456789abcdef/settings/",
+        "get",
+        _not_modified,
+    )
+    settings = await client.async_send_request(url)
+    assert client.response_cache.misses == 1
+    assert len(client.response_cache) == 1
+    settings["ring_tone"] = "changed"
+    cached = await client.async_send_request(url)
+    assert client.response_cache.hits == 1
+    assert cached["ring_tone"] == "0"
+
+    # Presigned media is not cached even with validators
+    aresponses.add(
+        "skybell-thumbnails-stage.s3.amazonaws.com",
+        "/image.jpeg",
+        "get",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "image/jpeg", "ETag": '"def"'},
+            body=b"\x00",
+        ),
+    )
+    media = "https://skybell-thumbnails-stage.s3.amazonaws.com/image.jpeg"
+    assert await client.async_send_request(media) == b"\x00"
+    assert len(client.response_cache) == 1
+
+    cache = ResponseCache(max_size=10)
+    cache.store("a", "1", None, b"1234", 4)
+    cache.store("b", None, "date", b"1234", 4)
+    assert cache.size == 8
+    assert cache.lookup("a") is not None
+    cache.store("c", "3", None, b"1234", 4)
+    assert cache.lookup("b") is None
+    assert cache.size == 8
+    cache.store("a", None, None, b"12", 2)
+    assert cache.lookup("a") is None
+    cache.store("d", "4", None, b"12345678901", 11)
+    assert len(cache) == 1
+    assert cache.misses == 5
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
 @pytest.mark.asyncio
 async def test_async_refresh_device(
     aresponses: ResponsesMockServer,
@@ -512,7 +812,6 @@ async def test_async_refresh_device(
 
     data = await client.async_get_devices()
     device = data[0]
-    activity_camera_image(aresponses, device.device_id)
     device_activities(aresponses, device.device_id)
     device_settings(aresponses, device.device_id)
     device_avatar(aresponses, device.device_id)
@@ -601,7 +900,7 @@ async def test_async_refresh_device(
     )
 
     assert isinstance(device.activities(event="device:sensor:motion"), list)
-    assert isinstance(device.latest(event="motion"), dict)
+    assert isinstance(device.latest(event="motion"), EventDict)
     assert device.latest(event="motion")[CONST.CREATED_AT] == dt.datetime(
         2020, 3, 30, 12, 35, 2, 204000, tzinfo=dt.timezone.utc
     )
@@ -612,14 +911,14 @@ async def test_async_refresh_device(
     device_activities(aresponses, device.device_id)
     await device.async_update()
 
-    device._info_json = {}
+    device._info_json = InfoDict()
     assert device.mac is None
     assert device.serial_no == ""
     assert device.firmware_ver == ""
     assert device.wifi_ssid == ""
     assert device.last_check_in == ""
 
-    device._settings_json = {}
+    device._update_settings(SettingsDict())
     assert device.do_not_disturb is False
     assert device.do_not_ring is False
     assert device.motion_sensor is False
@@ -627,26 +926,437 @@ async def test_async_refresh_device(
     loop = asyncio.get_running_loop()
     loop.run_in_executor(None, os.remove(client._cache_path))
 
-    device_activities(aresponses, device.device_id)
     activity_camera_image_not_found(aresponses, device.device_id)
-    await device._async_update_activities()
+    await device._async_activity_image_update()
     assert device.images["activity"] is None
 
     assert aresponses.assert_no_unused_routes() is None
 
 
+@pytest.mark.asyncio
+async def test_async_update_concurrent(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test refreshing device with concurrent sub-requests."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+
+    device_avatar(aresponses, device.device_id)
+    device_info(aresponses)
+    device_settings(aresponses, device.device_id)
+    device_activities(aresponses, device.device_id)
+    avatar_camera_image(aresponses, device.device_id)
+    activity_camera_image(aresponses, device.device_id)
+    await device.async_update(concurrency=4)
+    assert device._avatar_json["createdAt"] == "2020-03-31T04:13:48.640Z"
+    assert device._info_json["serialNo"] == "0123456789"
+    assert device._settings_json["video_profile"] == "1"
+    assert device.activities()[0][CONST.ID] == "1234567890ab1234567890ab"
+    assert device.images == {"activity": b"\x00\x00", "avatar": b"\x00"}
+
+    device = data[1]
+    device_avatar(aresponses, device.device_id)
+    device_activities(aresponses, device.device_id)
+    avatar_camera_image(aresponses, data[0].device_id)
+    activity_camera_image(aresponses, data[0].device_id)
+    await device.async_update(concurrency=4)
+    assert not device._info_json
+    assert not device._settings_json
+
+    running = 0
+    peak = 0
+
+    async def _job(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return value
+
+    jobs = [lambda value=value: _job(value) for value in range(5)]
+    assert await UTILS.async_gather_limited(2, jobs[0], None, *jobs[1:]) == [
+        0,
+        None,
+        1,
+        2,
+        3,
+        4,
+    ]
+    assert peak == 2
+
+    async def _fail() -> None:
+        raise exceptions.SkybellException
+
+    with pytest.raises(exceptions.SkybellException):
+        await UTILS.async_gather_limited(2, _fail, jobs[0])
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_async_update_changes(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test the changes reported by a device update."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+
+    calls = []
+    events = []
+
+    async def _events(key: str, old: None, new: list) -> None:
+        events.append((key, old, new))
+
+    def _fail(*_: str) -> None:
+        raise ValueError
+
+    device.subscribe("settings.video_profile", lambda *args: calls.append(args))
+    device.subscribe(CONST.CHANGE_AVATAR, lambda *args: calls.append(args))
+    device.subscribe(CONST.CHANGE_EVENTS, _events)
+    device.subscribe("info.mac", _fail)
+    unsubscribe = device.subscribe("settings.ring_tone", _fail)
+    unsubscribe()
+
+    device_avatar(aresponses, device.device_id)
+    device_info(aresponses)
+    device_settings(aresponses, device.device_id)
+    device_activities(aresponses, device.device_id)
+    avatar_camera_image(aresponses, device.device_id)
+    activity_camera_image(aresponses, device.device_id)
+    changes = await device.async_update()
+    assert set(changes) == {
+        CONST.CHANGE_AVATAR,
+        CONST.CHANGE_EVENTS,
+        CONST.CHANGE_INFO,
+        CONST.CHANGE_SETTINGS,
+    }
+    assert changes[CONST.CHANGE_SETTINGS]["video_profile"] == (None, "1")
+    assert changes[CONST.CHANGE_INFO]["mac"] == (None, "ff:ff:ff:ff:ff:ff")
+    assert changes[CONST.CHANGE_EVENTS] == device.activities(limit=None)[::-1]
+    assert calls == [
+        ("avatar.createdAt", None, "2020-03-31T04:13:48.640Z"),
+        ("avatar.url", None, device.image_url),
+        ("settings.video_profile", None, "1"),
+    ]
+    assert events == [("events", None, changes[CONST.CHANGE_EVENTS])]
+
+    device_avatar(aresponses, device.device_id)
+    aresponses.add(
+        "cloud.myskybell.com",
+        f"/api/v3/devices/{device.device_id}/info/",
+        "get",
+        aresponses.Response(
+            status=403,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture("device-info-forbidden.json"),
+        ),
+    )
+    device_settings(aresponses, device.device_id)
+    device_activities(aresponses, device.device_id)
+    assert await device.async_update(device_json={CONST.NAME: "Back Door"}) == {
+        CONST.CHANGE_DEVICE: {CONST.NAME: ("Front Door", "Back Door")}
+    }
+    assert len(calls) == 3
+    assert len(events) == 1
+    assert device.info_forbidden is True
+
+    # Refreshing the devices list reports the fields that changed
+    devices = json.loads(load_fixture("devices.json"))
+    devices[0] |= {CONST.NAME: "Side Door", CONST.STATUS: "down"}
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=json.dumps(devices),
+        ),
+    )
+    device.subscribe(CONST.CHANGE_DEVICE, lambda *args: calls.append(args))
+    await client.async_get_devices(refresh=True)
+    assert calls[3:] == [
+        ("device.name", "Back Door", "Side Door"),
+        ("device.status", "up", "down"),
+    ]
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_async_update_all(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test updating all devices in parallel."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+
+    async def _slow_update() -> None:
+        await asyncio.sleep(10)
+
+    with patch.object(data[0], "async_update") as update, patch.object(
+        data[1], "async_update", side_effect=exceptions.SkybellAuthenticationException
+    ), patch.object(data[2], "async_update", side_effect=_slow_update):
+        report = await client.async_update_all(concurrency=2, timeout=0.1)
+    update.assert_called_once_with()
+    assert report[data[0].device_id]["changes"] is update.return_value
+    assert report[data[0].device_id]["success"] is True
+    assert report[data[0].device_id]["error"] is None
+    assert report[data[1].device_id]["success"] is False
+    assert isinstance(
+        report[data[1].device_id]["error"], exceptions.SkybellAuthenticationException
+    )
+    assert report[data[2].device_id]["success"] is False
+    assert isinstance(report[data[2].device_id]["error"], exceptions.SkybellException)
+
+    # Refreshing the devices list only merges it, each device updates once
+    devices_response(aresponses)
+    with patch.object(SkybellDevice, "async_update", autospec=True) as update:
+        report = await client.async_update_all(refresh_devices=True)
+    assert sorted(call.args[0].device_id for call in update.call_args_list) == sorted(
+        report
+    )
+    assert all(result["success"] for result in report.values())
+
+    with patch.object(client, "async_get_devices", return_value=[]):
+        assert not await client.async_update_all()
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
+def test_models() -> None:
+    """Test the slotted models and their mapping view."""
+    data = json.loads(load_fixture("activities.json"))[0]
+    event = EventDict.from_json(data)
+    assert not hasattr(event, "__dict__")
+    assert event.id == data[CONST.ID]
+    assert event[CONST.CREATED_AT] == event.createdAt == data[CONST.CREATED_AT]
+    assert event == data
+    assert dict(event) == data
+    assert len(event) == len(data)
+    assert event.get("unknown") is None
+    with pytest.raises(KeyError):
+        event["unknown"]  # pylint:disable=pointless-statement
+
+    event["unknown"] = "value"
+    assert event["unknown"] == "value"
+    assert "unknown" in event
+    del event["unknown"]
+    del event[CONST.MEDIA_URL]
+    assert event.media is None
+    assert CONST.MEDIA_URL not in event
+    with pytest.raises(KeyError):
+        del event[CONST.MEDIA_URL]
+
+    copied = event | {CONST.EVENT: CONST.EVENT_BUTTON}
+    assert isinstance(copied, EventDict)
+    assert copied.event == CONST.EVENT_BUTTON
+    assert event.event == data[CONST.EVENT]
+
+    settings = SettingsDict(video_profile="1")
+    assert UTILS.update(settings, {"video_profile": "2", "new": "x"}) is settings
+    assert settings.video_profile == "2"
+    assert settings == {"video_profile": "2", "new": "x"}
+    assert repr(InfoDict()) == "InfoDict({})"
+
+
+def test_event_store() -> None:
+    """Test the indexed event store."""
+    store = EventStore()
+    activities = [
+        EventDict.from_json(act) for act in json.loads(load_fixture("activities.json"))
+    ]
+    new = [
+        EventDict.from_json(act)
+        for act in json.loads(load_fixture("new-activity.json"))
+    ]
+    store.add(activities + new)
+    assert len(store) == 3
+    assert [act[CONST.ID] for act in store.activities()] == [
+        "1234567890ab1234567890ac",
+        "1234567890ab1234567890ab",
+        "1234567890ab1234567890a9",
+    ]
+    assert [act[CONST.ID] for act in store.activities(limit=1)] == [
+        "1234567890ab1234567890ac"
+    ]
+    motion = store.activities(event=CONST.EVENT_MOTION)
+    assert [act[CONST.ID] for act in motion] == [
+        "1234567890ab1234567890ac",
+        "1234567890ab1234567890ab",
+    ]
+    assert not store.activities(event=CONST.EVENT_BUTTON)
+    since = dt.datetime(2020, 3, 30, 12, tzinfo=dt.timezone.utc)
+    until = dt.datetime(2020, 3, 30, 13, tzinfo=dt.timezone.utc)
+    assert [act[CONST.ID] for act in store.activities(since=since, until=until)] == [
+        "1234567890ab1234567890ab"
+    ]
+    assert store.activities(since=until)[0][CONST.ID] == "1234567890ab1234567890ac"
+    assert store.activities(until=since)[0][CONST.ID] == "1234567890ab1234567890a9"
+    latest = store.latest()
+    assert latest is not None
+    assert latest[1][CONST.ID] == "1234567890ab1234567890ac"
+    latest_time = dt.datetime(2020, 3, 30, 13, 30, 2, 204000, dt.timezone.utc)
+    assert latest[0] == latest_time
+    latest = store.latest(CONST.EVENT_ON_DEMAND)
+    assert latest is not None
+    assert latest[1][CONST.ID] == "1234567890ab1234567890a9"
+
+    assert store.watermark == latest_time
+    assert store.get("1234567890ab1234567890a9") is activities[1]
+    assert not store.add(activities + new)
+    newer = new[0] | {"id": "1234567890ab1234567890ad", "event": CONST.EVENT_BUTTON}
+    older = new[0] | {"id": "1234567890ab1234567890a8", "createdAt": "2020-01-01"}
+    assert store.add([newer, older]) == [newer]
+    assert store.watermark == latest_time
+
+    store.max_size = 2
+    newest = newer | {
+        "id": "1234567890ab1234567890ae",
+        "createdAt": "2021-01-01T00:00:00.000Z",
+    }
+    assert store.add([newest]) == [newest]
+    assert len(store) == 2
+    assert store.get("1234567890ab1234567890a9") is None
+    assert [act[CONST.ID] for act in store.activities()] == [
+        "1234567890ab1234567890ae",
+        "1234567890ab1234567890ad",
+    ]
+    assert not store.activities(event=CONST.EVENT_MOTION)
+    latest = store.latest(CONST.EVENT_MOTION)
+    assert latest is not None
+    assert latest[1][CONST.ID] == "1234567890ab1234567890ac"
+
+    # Timestamps are compared as times, not as strings
+    store = EventStore()
+    first = newer | {"createdAt": "2020-03-30T13:30:02Z"}
+    second = newer | {"id": "1234567890ab1234567890af"}
+    second["createdAt"] = "2020-03-30T13:30:02.500Z"
+    assert store.add([first]) == [first]
+    assert store.add([second]) == [second]
+    assert store.watermark == dt.datetime(
+        2020, 3, 30, 13, 30, 2, 500000, dt.timezone.utc
+    )
+
+    # Copies within one batch are added once
+    store = EventStore(2)
+    assert store.add([first, first]) == [first]
+    newest = second | {"id": "1234567890ab1234567890b0"}
+    assert store.add([second, newest]) == [second, newest]
+    assert store.get(first.id) is None
+    assert len(store) == 2
+
+    # A known activity takes the fresh media URLs
+    assert not store.add([newest | {"media": "https://example.com/fresh.jpeg"}])
+    assert store.get(newest.id).media == "https://example.com/fresh.jpeg"
+
+    device = SkybellDevice({"id": "012345670123456789abcdef"}, None)
+    assert device.latest() == {}
+    assert device.latest("button")[CONST.CREATED_AT] == dt.datetime(
+        1970, 1, 1, tzinfo=dt.timezone.utc
+    )
+
+
+@pytest.mark.asyncio
+async def test_activity_archive(
+    aresponses: ResponsesMockServer,
+    apisession: ClientSession,
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test archiving activities in SQLite."""
+    path = str(tmp_path / "activities.db")
+    async with Skybell(
+        EMAIL,
+        PASSWORD,
+        login_sleep=False,
+        session=apisession,
+        disable_cache=True,
+        archive_path=path,
+    ) as client:
+        login_response(aresponses)
+        devices_response(aresponses)
+        device = (await client.async_get_devices())[0]
+        device_activities(aresponses, device.device_id)
+        new_activity(aresponses, device.device_id)
+        activity_camera_image(aresponses, device.device_id)
+        new_activity_camera_image(aresponses, device.device_id)
+        await device._async_update_activities()
+        await device._async_update_activities()
+
+        history = await device.async_history()
+        assert [act[CONST.ID] for act in history] == [
+            "1234567890ab1234567890ac",
+            "1234567890ab1234567890ab",
+            "1234567890ab1234567890a9",
+        ]
+        assert history[0] == json.loads(load_fixture("new-activity.json"))[0]
+        motion = await device.async_history(
+            event=CONST.EVENT_MOTION,
+            since=dt.datetime(2020, 3, 30, 12, tzinfo=dt.timezone.utc),
+            until=dt.datetime(2020, 3, 30, 13, tzinfo=dt.timezone.utc),
+        )
+        assert [act[CONST.ID] for act in motion] == ["1234567890ab1234567890ab"]
+        assert len(await device.async_history(limit=1)) == 1
+        assert not await client.archive.async_query("other")
+
+        # A createdAt without offset is UTC, as in the event store
+        naive = EventDict.from_json(json.loads(load_fixture("new-activity.json"))[0])
+        naive.id, naive.createdAt = "1234567890ab1234567890b0", "2020-03-30T12:45:00"
+        monkeypatch.setenv("TZ", "America/New_York")
+        time.tzset()
+        try:
+            await client.archive.async_add(device.device_id, [naive])
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        history = await device.async_history(
+            since=dt.datetime(2020, 3, 30, 12, 40, tzinfo=dt.timezone.utc),
+            until=dt.datetime(2020, 3, 30, 12, 50, tzinfo=dt.timezone.utc),
+        )
+        assert [act[CONST.ID] for act in history] == [naive.id]
+
+    client = Skybell(EMAIL, PASSWORD, session=apisession, disable_cache=True)
+    device = SkybellDevice({"id": "012345670123456789abcdef"}, client)
+    with pytest.raises(exceptions.SkybellException):
+        await device.async_history()
+
+    async with Skybell(
+        EMAIL, PASSWORD, session=apisession, disable_cache=True, archive_path=path
+    ) as client:
+        history = await client.archive.async_query(device.device_id)
+        assert len(history) == 4
+
+    assert aresponses.assert_no_unused_routes() is None
+
+
 @pytest.mark.asyncio
 async def test_async_change_setting(
     aresponses: ResponsesMockServer, client: Skybell
 ) -> None:
     """Test changing settings on device."""
+    client._retry_policy.attempts = 0
 
     login_response(aresponses)
     devices_response(aresponses)
 
     data = await client.async_get_devices()
     device = data[0]
-    with patch("aioskybell.device.SkybellDevice._async_settings_request"):
+    with patch(
+        "aioskybell.device.SkybellDevice._async_settings_request", return_value=None
+    ):
         await device.async_set_setting(CONST.DO_NOT_DISTURB, True)
     assert device._settings_json is not None
     await device.async_set_setting(CONST.DO_NOT_RING, True)
@@ -660,6 +1370,23 @@ async def test_async_change_setting(
     await device.async_set_setting(CONST.VIDEO_PROFILE, 1)
     await device.async_set_setting(CONST.BRIGHTNESS, 33)
     await device.async_set_setting("brightness", 33)
+    assert device.outdoor_chime_level == 0
+
+    aresponses.add(
+        "cloud.myskybell.com",
+        f"/api/v3/devices/{device.device_id}/settings/",
+        "patch",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text='{"chime_level": "2", "green_r": "255"}',
+        ),
+    )
+    await device.async_set_setting(CONST.OUTDOOR_CHIME, 2)
+    assert device.outdoor_chime_level == 2
+    assert device.outdoor_chime is True
+    assert device.led_rgb == (255, 0, 0)
+    assert device._settings_json["chime_level"] == "2"
 
     with pytest.raises(exceptions.SkybellException):
         await client.async_get_device("foo")
@@ -713,6 +1440,65 @@ async def test_cache(client: Skybell) -> None:
 
     assert UTILS.update("", "") == ""
 
+    await UTILS.async_save_cache({"access_token": "key"}, client._cache_path)
+    async with aiofiles.open(client._cache_path, "rb") as file:
+        assert await file.read() == b'{"version":1,"data":{"access_token":"key"}}'
+    assert await UTILS.async_load_cache(client._cache_path) == {"access_token": "key"}
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+    with patch("aioskybell.utils.os.replace", side_effect=OSError), pytest.raises(
+        OSError
+    ):
+        await UTILS.async_save_cache({}, client._cache_path)
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+    async with aiofiles.open(client._cache_path, "wb") as file:
+        await file.write(pickle.dumps({"access_token": "legacy", "devices": {}}))
+    await client._async_load_cache()
+    assert client._cache["access_token"] == "legacy"
+    async with aiofiles.open(client._cache_path, "rb") as file:
+        assert (await file.read()).startswith(b'{"version":1,')
+
+    for content in (
+        pickle.dumps({"access_token": dt.datetime(2020, 1, 1)}),
+        b'{"version":2,"data":{"access_token":"new"}}',
+    ):
+        async with aiofiles.open(client._cache_path, "wb") as file:
+            await file.write(content)
+        await client._async_load_cache()
+        assert client._cache["access_token"] == "legacy"
+
+    os.remove(client._cache_path)
+
+
+@pytest.mark.asyncio
+async def test_cache_write_behind(apisession: ClientSession) -> None:
+    """Test delayed cache writes."""
+    with patch("aioskybell.utils.async_save_cache") as save:
+        async with Skybell(
+            EMAIL, PASSWORD, session=apisession, cache_flush_delay=0.01
+        ) as client:
+            for token in ("a", "b", "c"):
+                await client.async_update_cache({CONST.ACCESS_TOKEN: token})
+            save.assert_not_called()
+            assert client.cache_writes_saved == 2
+            await asyncio.sleep(0.05)
+            save.assert_awaited_once()
+
+            await client.async_update_cache({CONST.ACCESS_TOKEN: "d"})
+            await client.async_flush()
+            assert save.await_count == 2
+            assert client._cache_flush_task is None
+            await client.async_flush()
+            assert save.await_count == 2
+
+            await client.async_logout()
+            assert save.await_count == 3
+
+            await client.async_update_cache({CONST.ACCESS_TOKEN: "e"})
+        assert save.await_count == 4
+        assert client.cache_writes_saved == 2
+
 
 @pytest.mark.asyncio
 async def test_async_test_ports(client: Skybell) -> None:
@@ -724,3 +1510,531 @@ async def test_async_test_ports(client: Skybell) -> None:
     with patch("aioskybell.ClientSession.get") as session:
         session.side_effect = Timeout
         assert await client.async_test_ports("1.2.3.4") is False
+
+
+@pytest.mark.asyncio
+async def test_push(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test receiving activities by push from a Socket.IO stand-in."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+    activity = json.loads(load_fixture("new-activity.json"))[0]
+    activity["device"] = device.device_id
+    pushed = []
+    device.subscribe(CONST.CHANGE_EVENTS, lambda *args: pushed.append(args[2]))
+    done = asyncio.Event()
+    sockets = []
+
+    async def _socket(request: web.Request) -> web.WebSocketResponse:
+        socket = web.WebSocketResponse()
+        await socket.prepare(request)
+        sockets.append(request)
+        if len(sockets) == 1:
+            # A malformed handshake only drops the connection
+            await socket.send_str('0{"sid":"a"}')
+            await socket.receive()
+            return socket
+        await socket.send_str(
+            '0{"sid":"a","upgrades":[],"pingInterval":25000,"pingTimeout":20000}'
+        )
+        assert await socket.receive_str() == "40"
+        if len(sockets) == 3:
+            await socket.send_str('44{"message":"Not authorized"}')
+            return socket
+        await socket.send_str('40{"sid":"b"}')
+        await socket.send_str("2")
+        assert await socket.receive_str() == "3"
+        await socket.send_str(f'42["activity",{json.dumps(activity)}]')
+        await socket.send_str('42["other","text",{"id":"1"}]')
+        if len(sockets) == 2:
+            await socket.send_str("41")
+        else:
+            done.set()
+        await socket.receive()
+        return socket
+
+    for _ in range(4):
+        aresponses.add(
+            "cloud.myskybell.com",
+            "/api/v3/register/",
+            "post",
+            aresponses.Response(
+                status=201, headers={"Content-Type": "application/json"}, text="{}"
+            ),
+        )
+        aresponses.add("cloud.myskybell.com", "/socket.io/", "get", _socket)
+    new_activity_camera_image(aresponses, device.device_id)
+
+    with patch("aioskybell.push.random.uniform", return_value=0):
+        push = await client.async_start_push()
+        await asyncio.wait_for(done.wait(), 5)
+    assert client.push is push
+    assert push.running
+    assert push.connected
+    assert push.connects == 2
+    assert push.activities == 1
+    assert sockets[0].query["EIO"] == "4"
+    assert sockets[0].headers["x-skybell-app-id"] == client.cache(CONST.APP_ID)
+    assert device.activities()[0] == activity
+    assert device.images["activity"] == bytes(3)
+    assert pushed == [[activity]]
+
+    await client.async_stop_push()
+    assert not push.running
+    assert not push.connected
+
+    # A poll after the push still adds the older activities it returns
+    polled = [
+        EventDict.from_json(act) for act in json.loads(load_fixture("activities.json"))
+    ]
+    new_activity_camera_image(aresponses, device.device_id)
+    new = await device._async_update_activities(
+        [EventDict.from_json(activity)] + polled
+    )
+    assert new == polled[::-1]
+    assert len(device.activities(limit=None)) == 3
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test polling devices on adaptive intervals."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+
+    scheduler = PollScheduler(interval=60.0, active_interval=10, max_interval=900)
+    assert scheduler.next_interval(device) == 60
+    assert scheduler.next_interval(device, 1) == 120
+    assert scheduler.next_interval(device, 5) == 900
+    created = dt.datetime.now(dt.timezone.utc) - dt.timedelta(seconds=400)
+    activity = json.loads(load_fixture("new-activity.json"))[0]
+    activity["createdAt"] = created.isoformat()
+    device._event_store.add([EventDict.from_json(activity)])
+    assert scheduler.next_interval(device) == 60
+    activity["id"] = "1234567890ab1234567890ad"
+    activity["createdAt"] = (created + dt.timedelta(seconds=200)).isoformat()
+    device._event_store.add([EventDict.from_json(activity)])
+    assert scheduler.next_interval(device) == 10
+
+    assert scheduler.next_interval(device, 5000) == 900
+
+    async def _poll(get_devices: bool = False) -> None:
+        # The device goes down after its first poll
+        if get_devices and polled:
+            data[2]._device_json[CONST.STATUS] = "down"
+        polled.append(get_devices)
+
+    polled: list[bool] = []
+    with patch.object(data[0], "async_update") as update, patch.object(
+        data[1], "async_update", side_effect=exceptions.SkybellException
+    ), patch.object(data[2], "async_update", side_effect=_poll):
+        scheduler = await client.async_start_polling(
+            interval=0.01, active_interval=0.01, max_interval=0.02, jitter=0
+        )
+        assert client.scheduler is scheduler
+        assert scheduler.running
+        for _ in range(100):
+            if all(state["polls"] >= 2 for state in scheduler.schedule.values()):
+                break
+            await asyncio.sleep(0.01)
+        await client.async_stop_polling()
+    assert not scheduler.running
+    update.assert_called_with(get_devices=True)
+
+    state = scheduler.schedule[data[0].device_id]
+    assert state["polls"] >= 2
+    assert state["failures"] == 0
+    assert state["error"] is None
+    assert state["interval"] == 0.01
+    assert isinstance(state["next_due"], dt.datetime)
+    assert state["mean_elapsed"] >= 0
+    state = scheduler.schedule[data[1].device_id]
+    assert state["failures"] >= 2
+    assert isinstance(state["error"], exceptions.SkybellException)
+    assert state["interval"] == 0.02
+    state = scheduler.schedule[data[2].device_id]
+    assert all(polled)
+    assert not data[2].is_up
+    assert state["failures"] >= 1
+    assert state["interval"] == 0.02
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+
+@pytest.mark.asyncio
+async def test_watch_events(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test streaming new events of a device and of all devices."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+    activities = [
+        EventDict.from_json(act) for act in json.loads(load_fixture("activities.json"))
+    ]
+    new = EventDict.from_json(json.loads(load_fixture("new-activity.json"))[0])
+
+    watch = device.async_watch_events()
+    first = asyncio.ensure_future(watch.__anext__())
+    await asyncio.sleep(0)
+    await device._async_store_activities(activities)
+    assert await first is activities[1]
+    assert await watch.__anext__() is activities[0]
+    await device._async_store_activities(activities + [new])
+    assert await watch.__anext__() is new
+    await watch.aclose()
+    assert not device._watchers
+
+    queue = EventQueue(1)
+    fleet = client.async_watch_events(queue)
+    first = asyncio.ensure_future(fleet.__anext__())
+    await asyncio.sleep(0)
+    assert all(dev._watchers == [queue] for dev in data)
+    await data[1]._async_store_activities(activities[1:])
+    assert await first == (data[1], activities[1])
+    await data[2]._async_store_activities([new])
+    assert await fleet.__anext__() == (data[2], new)
+    await fleet.aclose()
+    assert not any(dev._watchers for dev in data)
+
+    queue = EventQueue()
+    device.add_watcher(queue)
+    newest = new | {"id": "1234567890ab1234567890b0", "createdAt": "2021-01-01"}
+    await device._async_store_activities([newest])
+    assert await queue.async_get() == (device, newest)
+    device.remove_watcher(queue)
+    assert not device._watchers
+
+    queue = EventQueue(1)
+    await queue.async_put(device, activities[0])
+    put = asyncio.ensure_future(queue.async_put(device, new))
+    await asyncio.sleep(0)
+    assert not put.done()
+    assert await queue.async_get() == (device, activities[0])
+    await put
+    assert await queue.async_get() == (device, new)
+
+    queue = EventQueue(1, CONST.WATCH_DROP_OLDEST)
+    await queue.async_put(device, activities[0])
+    await queue.async_put(device, new)
+    assert len(queue) == 1
+    assert queue.dropped == 1
+    assert await queue.async_get() == (device, new)
+    queue = EventQueue(1, CONST.WATCH_DROP_NEWEST)
+    await queue.async_put(device, activities[0])
+    await queue.async_put(device, new)
+    assert queue.dropped == 1
+    assert await queue.async_get() == (device, activities[0])
+    with pytest.raises(exceptions.SkybellException):
+        EventQueue(policy="unknown")
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+
+
+@pytest.mark.asyncio
+async def test_batch_settings(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test merging settings changes into one PATCH request."""
+    login_response(aresponses)
+    devices_response(aresponses)
+    data = await client.async_get_devices()
+    device = data[0]
+    bodies = []
+
+    async def _patch(request: web.Request) -> web.Response:
+        bodies.append(await request.json())
+        return aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=json.dumps({key: str(value) for key, value in bodies[-1].items()}),
+        )
+
+    for _ in range(3):
+        aresponses.add(
+            "cloud.myskybell.com",
+            f"/api/v3/devices/{device.device_id}/settings/",
+            "patch",
+            _patch,
+        )
+
+    await asyncio.gather(
+        device.async_set_setting(CONST.DO_NOT_DISTURB, True),
+        device.async_set_setting(CONST.OUTDOOR_CHIME, 2),
+        device.async_set_setting(CONST.MOTION_THRESHOLD, 32),
+        device.async_set_setting(CONST.RGB_COLOR, (255, 0, 0)),
+    )
+    assert bodies == [
+        {
+            "do_not_disturb": "True",
+            "chime_level": 2,
+            "motion_threshold": 32,
+            "green_r": 255,
+            "green_g": 0,
+            "green_b": 0,
+        }
+    ]
+    assert device.outdoor_chime_level == 2
+    assert device.led_rgb == (255, 0, 0)
+
+    # A change from another task waits for the batch it joined
+    outside = asyncio.ensure_future(
+        device.async_set_setting(CONST.DO_NOT_DISTURB, False)
+    )
+    async with device.async_batch_settings():
+        await device.async_set_setting(CONST.VIDEO_PROFILE, 1)
+        async with device.async_batch_settings():
+            await device.async_set_setting(CONST.BRIGHTNESS, 50)
+        with pytest.raises(exceptions.SkybellException):
+            await device.async_set_setting(CONST.BRIGHTNESS, 101)
+        await asyncio.sleep(0.01)
+        assert not outside.done()
+        assert len(bodies) == 1
+    await outside
+    assert bodies[1] == {
+        "video_profile": 1,
+        "led_intensity": 50,
+        "do_not_disturb": "False",
+    }
+    assert device.video_profile == 1
+    assert device.led_intensity == 50
+
+    # A batch that raises sends nothing and fails the waiting callers
+    outside = asyncio.ensure_future(
+        device.async_set_setting(CONST.DO_NOT_DISTURB, True)
+    )
+    with pytest.raises(ValueError):
+        async with device.async_batch_settings():
+            await device.async_set_setting(CONST.VIDEO_PROFILE, 0)
+            await asyncio.sleep(0.01)
+            raise ValueError
+    with pytest.raises(exceptions.SkybellException):
+        await outside
+    assert len(bodies) == 2
+    assert device.video_profile == 1
+    assert device.do_not_disturb is False
+
+    async def _later() -> None:
+        await asyncio.sleep(0.001)
+        await device.async_set_setting(CONST.OUTDOOR_CHIME, 1)
+
+    device.settings_window = 0.05
+    await asyncio.gather(device.async_set_setting(CONST.DO_NOT_RING, False), _later())
+    assert bodies[2] == {"do_not_ring": "False", "chime_level": 1}
+
+    # Reasserting the current state sends nothing
+    device.settings_window = 0
+    await device.async_set_setting(CONST.OUTDOOR_CHIME, 1)
+    await device.async_set_setting(CONST.DO_NOT_RING, False)
+    await device.async_set_setting(CONST.RGB_COLOR, (255, 0, 0))
+    await device.async_set_setting("brightness", 50)
+    assert len(bodies) == 3
+
+    async with device.async_batch_settings():
+        pass
+    assert len(bodies) == 3
+
+    # An empty response applies the requested values
+    aresponses.add(
+        "cloud.myskybell.com",
+        f"/api/v3/devices/{device.device_id}/settings/",
+        "patch",
+        aresponses.Response(status=200),
+    )
+    changes = []
+    device.subscribe("settings.motion_policy", lambda *args: changes.append(args))
+    await device.async_set_setting("motion_sensor", True)
+    assert device.motion_sensor is True
+    assert device._settings_json.motion_policy == CONST.MOTION_POLICY_ON
+    assert changes == [("settings.motion_policy", None, CONST.MOTION_POLICY_ON)]
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_request_pipeline(
+    aresponses: ResponsesMockServer, client: Skybell
+) -> None:
+    """Test the prebuilt device URLs and request headers."""
+    urls = DeviceEndpoints.build("012345670123456789abcdef")
+    device_url = CONST.DEVICE_URL.replace("$DEVID$", "012345670123456789abcdef")
+    assert urls.settings == device_url + "settings/"
+    assert urls.activity_video("1234") == device_url + "activities/1234/video/"
+
+    headers = client._api_headers()
+    assert client._api_headers() is headers
+    assert "Authorization" not in headers
+    assert headers["accept-encoding"] == "gzip, deflate"
+
+    async def _devices(request: web.Request) -> web.Response:
+        assert request.headers["Authorization"].startswith("Bearer ")
+        assert "gzip" in request.headers["Accept-Encoding"]
+        return aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture("devices.json"),
+        )
+
+    login_response(aresponses)
+    aresponses.add("cloud.myskybell.com", "/api/v3/devices/", "get", _devices)
+    await client.async_get_devices()
+    assert client._api_headers() is not headers
+    assert client._api_headers()["Authorization"].startswith("Bearer ")
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_metrics(aresponses: ResponsesMockServer) -> None:
+    """Test the request metrics per endpoint group."""
+    device_url = "/api/v3/devices/012345670123456789abcdef/"
+    login_response(aresponses)
+    aresponses.add(
+        "cloud.myskybell.com",
+        "/api/v3/devices/",
+        "get",
+        aresponses.Response(status=503),
+    )
+    devices_response(aresponses)
+    aresponses.add(
+        "cloud.myskybell.com",
+        f"{device_url}avatar/",
+        "get",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture("device-avatar.json"),
+        ),
+    )
+    aresponses.add(
+        "cloud.myskybell.com",
+        f"{device_url}settings/",
+        "patch",
+        aresponses.Response(status=200),
+    )
+
+    metrics = Metrics()
+    async with ClientSession(trace_configs=[metrics.trace_config]) as session:
+        async with Skybell(
+            EMAIL,
+            PASSWORD,
+            disable_cache=True,
+            login_sleep=False,
+            metrics=metrics,
+            retry_policy=RetryPolicy(backoff=0, jitter=0),
+            session=session,
+        ) as client:
+            assert client.metrics is metrics
+            await client.async_login()
+            await client.async_send_request(CONST.DEVICES_URL)
+            url = CONST.DEVICE_AVATAR_URL.replace("$DEVID$", "012345670123456789abcdef")
+            first, second = await asyncio.gather(
+                client.async_send_request(url), client.async_send_request(url)
+            )
+            assert first == second
+            await client.async_send_request(
+                url.replace("avatar", "settings"),
+                json={"chime_level": 1},
+                method=CONST.HTTPMethod.PATCH,
+            )
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {"login", "devices", "avatar", "settings"}
+    assert snapshot["devices"]["count"] == 2
+    assert snapshot["devices"]["statuses"] == {"5xx": 1, "2xx": 1}
+    assert snapshot["devices"]["retries"] == 1
+    assert snapshot["devices"]["bytes_in"] == len(load_fixture("devices.json"))
+    assert snapshot["avatar"]["count"] == 1
+    assert snapshot["avatar"]["coalesced"] == 1
+    assert snapshot["settings"]["bytes_out"] == len('{"chime_level": 1}')
+    assert snapshot["login"]["ttfb"]["count"] == 1
+    assert snapshot["login"]["latency"]["buckets"][math.inf] == 1
+
+    text = metrics.prometheus()
+    assert 'aioskybell_requests_total{endpoint="devices",status="5xx"} 1' in text
+    assert 'aioskybell_retries_total{endpoint="devices"} 1' in text
+    assert (
+        'aioskybell_request_duration_seconds_bucket{endpoint="login",le="+Inf"} 1'
+        in text
+    )
+
+    assert endpoint_group(url.replace("avatar", "activities")) == "activities"
+    assert endpoint_group(url.replace("avatar/", "activities/1/video/")) == "video_url"
+    assert endpoint_group("https://skybell.s3.amazonaws.com/video.mp4") == "media"
+    assert endpoint_group(CONST.USERS_ME_URL) == "other"
+
+    metrics.reset()
+    assert not metrics.snapshot()
+    assert aresponses.assert_no_unused_routes() is None
+
+
+@pytest.mark.asyncio
+async def test_tracing(aresponses: ResponsesMockServer, client: Skybell) -> None:
+    """Test tracing spans around updates."""
+    assert client.tracer.span("off") is client.tracer.span("other")
+
+    spans: list[SpanDict] = []
+    tracer = Tracer(spans.append)
+    with tracer.span("parent", key="value"):
+        assert (parent := current_span()) is not None
+        with tracer.span("child"):
+            pass
+
+        async def _task() -> None:
+            with tracer.span("task"):
+                await asyncio.sleep(0)
+
+        await asyncio.ensure_future(_task())
+        with pytest.raises(ValueError), tracer.span("error"):
+            raise ValueError
+    assert current_span() is None
+    assert [span["name"] for span in spans] == ["child", "task", "error", "parent"]
+    child, task, error, root = spans[0], spans[1], spans[2], spans[3]
+    assert root is parent and root["parent_id"] is None
+    assert root["attributes"] == {"key": "value"}
+    assert child["parent_id"] == task["parent_id"] == root["span_id"]
+    assert {child["trace_id"], error["trace_id"]} == {root["trace_id"]}
+    assert error["error"] == "ValueError" and root["error"] is None
+    assert root["duration"] >= child["duration"]
+
+    def _fail(span: SpanDict) -> None:
+        raise RuntimeError
+
+    with Tracer(_fail).span("ignored"):
+        pass
+
+    login_response(aresponses)
+    devices_response(aresponses)
+    device = (await client.async_get_devices())[0]
+    device_avatar(aresponses, device.device_id)
+    device_info(aresponses)
+    device_settings(aresponses, device.device_id)
+    device_activities(aresponses, device.device_id)
+    avatar_camera_image(aresponses, device.device_id)
+    activity_camera_image(aresponses, device.device_id)
+
+    spans.clear()
+    client.tracer.exporter = spans.append
+    await device.async_update(concurrency=2)
+    update = spans[-1]
+    assert update["name"] == CONST.SPAN_UPDATE
+    assert update["attributes"] == {"device_id": device.device_id}
+    requests = {
+        span["attributes"]["endpoint"]
+        for span in spans
+        if span["name"] == CONST.SPAN_REQUEST and span["parent_id"] == update["span_id"]
+    }
+    assert requests == {"avatar", "info", "settings", "activities", "media"}
+
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, os.remove(client._cache_path))
+    assert aresponses.assert_no_unused_routes() is None